@@ -0,0 +1,83 @@
+"""
+Autenticação JWT sem consulta ao banco por requisição.
+
+O token de acesso carrega user_type, username, clube_id e is_superuser, e as
+views recebem um UsuarioToken montado só com essas claims. Para que mudanças de
+papel, clube, senha ou desativação valham logo, o token também carrega a
+versao_token do usuário: ela sobe no banco a cada mudança dessas (ver
+signals.py) e um token com versão antiga é recusado. A versão atual fica em
+cache, então o caso comum continua sem query. Com a cache local de cada
+processo, uma mudança feita em outro worker, no shell ou por changepassword
+só é vista aqui quando a entrada expira (VERSAO_TTL); com uma cache
+compartilhada (CACHES) a publicação vale para todos na hora.
+"""
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+
+from .models import User
+
+# Campos do usuário copiados para o token; mudar qualquer um deles invalida os tokens emitidos
+CAMPOS_TOKEN = ('user_type', 'username', 'clube_id', 'is_superuser', 'is_staff')
+CAMPOS_REVOGACAO = CAMPOS_TOKEN + ('is_active', 'password')
+# Segundos que a versão fica em cache: o atraso máximo de uma revogação vinda de outro processo
+VERSAO_TTL = 30
+
+
+def _chave_versao(user_id):
+    return f"token-versao:{user_id}"
+
+
+def versao_token(user_id):
+    """Versão atual dos tokens do usuário (None se ele não existe mais)."""
+    versao = cache.get(_chave_versao(user_id))
+    if versao is None:
+        versao = User.objects.filter(pk=user_id, is_active=True).values_list('versao_token', flat=True).first()
+        if versao is not None:
+            cache.set(_chave_versao(user_id), versao, VERSAO_TTL)
+    return versao
+
+
+def publicar_versao(user_id, versao):
+    cache.set(_chave_versao(user_id), versao, VERSAO_TTL)
+
+
+def esquecer_versao(user_id):
+    cache.delete(_chave_versao(user_id))
+
+
+def adicionar_claims(token, user):
+    for campo in CAMPOS_TOKEN:
+        token[campo] = getattr(user, campo)
+    token['versao'] = user.versao_token
+    return token
+
+
+class UsuarioToken(TokenUser):
+    """Usuário montado a partir das claims do token, com os campos que as views usam."""
+
+    @cached_property
+    def user_type(self):
+        return self.token.get('user_type')
+
+    @cached_property
+    def clube_id(self):
+        return self.token.get('clube_id')
+
+
+class JWTAutenticacaoToken(JWTAuthentication):
+    """
+    Autentica pelas claims do token. Tokens emitidos antes das claims existirem
+    caem no caminho antigo, que carrega o User do banco.
+    """
+
+    def get_user(self, validated_token):
+        if 'versao' not in validated_token:
+            return super().get_user(validated_token)
+
+        usuario = UsuarioToken(validated_token)
+        if versao_token(usuario.id) != validated_token['versao']:
+            raise InvalidToken("Token revogado: o usuário mudou desde a emissão. Faça login novamente.")
+        return usuario
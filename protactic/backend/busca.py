@@ -0,0 +1,249 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .imagens import TAMANHOS, caminho_variante
+from .models import Clube, Competicao, IndiceBusca, Jogador
+
+# Modelos indexados, na ordem em que aparecem no resultado da busca
+MODELOS_BUSCA = {
+    'JOGADOR': Jogador,
+    'COMPETICAO': Competicao,
+    'CLUBE': Clube,
+}
+TIPOS_POR_MODELO = {modelo: tipo for tipo, modelo in MODELOS_BUSCA.items()}
+
+# Fim de intervalo para buscar prefixos com um range scan no índice (token >= p AND token < p + FIM)
+FIM_PREFIXO = '\uffff'
+CANDIDATOS_POR_RESULTADO = 10
+
+# Campos de imagem e de hash das variantes exibidos no dropdown de cada tipo (Competicao não tem)
+IMAGEM_POR_TIPO = {
+    'JOGADOR': ('foto', 'foto_hash'),
+    'COMPETICAO': None,
+    'CLUBE': ('escudo', 'escudo_hash'),
+}
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos: 'São Paulo' -> 'sao paulo'."""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def tokenizar(texto):
+    return [t[:100] for t in re.findall(r'\w+', normalizar(texto))]
+
+
+def linhas_indice(tipo, objeto):
+    return [
+        IndiceBusca(tipo=tipo, objeto_id=objeto.pk, token=token, posicao=posicao, nome=objeto.nome[:200])
+        for posicao, token in enumerate(tokenizar(objeto.nome))
+    ]
+
+
+def indexar(objeto):
+    tipo = TIPOS_POR_MODELO[type(objeto)]
+    with transaction.atomic():
+        IndiceBusca.objects.filter(tipo=tipo, objeto_id=objeto.pk).delete()
+        IndiceBusca.objects.bulk_create(linhas_indice(tipo, objeto))
+    transaction.on_commit(lambda: autocomplete.invalidar(tipo, objeto))
+
+
+def remover_do_indice(objeto):
+    tipo = TIPOS_POR_MODELO[type(objeto)]
+    IndiceBusca.objects.filter(tipo=tipo, objeto_id=objeto.pk).delete()
+    transaction.on_commit(lambda: autocomplete.invalidar(tipo, objeto))
+
+
+def reindexar_tudo(tamanho_lote=1000):
+    """Reconstrói o índice inteiro. Retorna o número de objetos indexados."""
+    total = 0
+    with transaction.atomic():
+        IndiceBusca.objects.all().delete()
+        for tipo, modelo in MODELOS_BUSCA.items():
+            lote = []
+            for objeto in modelo.objects.only('id', 'nome').iterator(chunk_size=tamanho_lote):
+                lote.extend(linhas_indice(tipo, objeto))
+                total += 1
+                if len(lote) >= tamanho_lote:
+                    IndiceBusca.objects.bulk_create(lote)
+                    lote = []
+            IndiceBusca.objects.bulk_create(lote)
+    transaction.on_commit(autocomplete.limpar)
+    return total
+
+
+def _prefixo(token):
+    return {'token__gte': token, 'token__lt': token + FIM_PREFIXO}
+
+
+def _rank(tokens, principal, nome_tokens, nome):
+    """Melhor posição do nome para o termo, no mesmo critério de buscar_ids (None se não casa)."""
+    if not all(any(t.startswith(q) for t in nome_tokens) for q in tokens):
+        return None
+    return min(
+        (token != principal, posicao, len(nome), nome)
+        for posicao, token in enumerate(nome_tokens) if token.startswith(principal)
+    )
+
+
+def buscar_ids(tipo, termo, limite=3):
+    """
+    IDs do tipo cujo nome tem palavras começando com cada palavra do termo, ranqueados.
+
+    A palavra mais longa do termo dirige um range scan limitado sobre (tipo, token);
+    as demais entram como subconsultas no mesmo índice, então o custo não cresce
+    com o tamanho da tabela.
+    """
+    tokens = tokenizar(termo)
+    if not tokens:
+        return []
+    principal = max(tokens, key=len)
+
+    qs = IndiceBusca.objects.filter(tipo=tipo, **_prefixo(principal))
+    for token in tokens:
+        if token != principal:
+            qs = qs.filter(objeto_id__in=IndiceBusca.objects.filter(tipo=tipo, **_prefixo(token)).values('objeto_id'))
+    candidatos = qs.order_by('token').values_list('objeto_id', 'token', 'posicao', 'nome')[:limite * CANDIDATOS_POR_RESULTADO]
+
+    # Palavra exata antes de prefixo, primeira palavra antes das demais, nomes curtos primeiro
+    melhores = {}
+    for objeto_id, token, posicao, nome in candidatos:
+        rank = (token != principal, posicao, len(nome), nome)
+        if objeto_id not in melhores or rank < melhores[objeto_id]:
+            melhores[objeto_id] = rank
+    return sorted(melhores, key=melhores.get)[:limite]
+
+
+def resultados_compactos(termo, limite=3, tipos=None):
+    """Só o que o dropdown usa: id, nome, tipo e caminho da imagem (relativo ao MEDIA_URL)."""
+    resultados = []
+    for tipo, modelo in MODELOS_BUSCA.items():
+        if tipos is not None and tipo not in tipos:
+            continue
+        ids = buscar_ids(tipo, termo, limite=limite)
+        if not ids:
+            continue
+        campos_imagem = IMAGEM_POR_TIPO[tipo] or ()
+        linhas = {linha['id']: linha for linha in modelo.objects.filter(id__in=ids).values('id', 'nome', *campos_imagem)}
+        for objeto_id in ids:
+            linha = linhas.get(objeto_id)
+            if linha is not None:
+                imagem = None
+                if campos_imagem and linha[campos_imagem[0]]:
+                    # Menor variante quando já existe; o original é só o fallback
+                    hash_conteudo = linha[campos_imagem[1]]
+                    imagem = caminho_variante(hash_conteudo, TAMANHOS[0]) if hash_conteudo else linha[campos_imagem[0]]
+                resultados.append((objeto_id, linha['nome'], tipo, imagem))
+    return resultados
+
+
+class CacheAutocomplete:
+    """
+    LRU em memória de termo normalizado -> resultados compactos da busca global.
+
+    É preenchido sob demanda, limitado a `max_entradas` e invalidado pelos sinais
+    dos modelos indexados. O TTL limita quanto tempo outros processos, que não
+    recebem os sinais deste, podem servir um resultado antigo.
+
+    Enquanto o usuário digita, o termo novo estreita um termo já em cache
+    ('sil' -> 'silv'): para cada tipo em que o termo curto trouxe menos que
+    `limite` resultados a lista dele já é completa, então o termo novo é
+    filtrado e ranqueado em memória e só os demais tipos vão ao banco.
+    """
+
+    def __init__(self, max_entradas=2048, ttl=60):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def buscar(self, termo, limite=3):
+        chave = (' '.join(tokenizar(termo)), limite)
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and agora - entrada[0] < self.ttl:
+                self._entradas.move_to_end(chave)
+                return entrada[1]
+            base = self._prefixo_em_cache(chave, agora)
+
+        if base is None:
+            criado, resultados = agora, resultados_compactos(termo, limite=limite)
+        else:
+            # Herda a idade da entrada de origem para não esticar o TTL de dados que ela já trazia
+            criado, resultados = base[0], self._estreitar(chave, base[1], termo)
+        with self._lock:
+            self._entradas[chave] = (criado, resultados)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return resultados
+
+    def _prefixo_em_cache(self, chave, agora):
+        """Entrada válida de um termo mais curto que o atual (última palavra encurtada ou removida)."""
+        tokens, limite = chave[0].split(), chave[1]
+        if not tokens:
+            return None
+        anteriores, ultimo = tokens[:-1], tokens[-1]
+        for tamanho in range(len(ultimo) - 1, -1, -1):
+            termo = ' '.join(anteriores + [ultimo[:tamanho]] if tamanho else anteriores)
+            if not termo:
+                return None
+            entrada = self._entradas.get((termo, limite))
+            if entrada is not None and agora - entrada[0] < self.ttl:
+                return entrada
+        return None
+
+    def _estreitar(self, chave, resultados, termo):
+        tokens, limite = chave[0].split(), chave[1]
+        principal = max(tokens, key=len)
+        por_tipo = {tipo: [] for tipo in MODELOS_BUSCA}
+        for resultado in resultados:
+            por_tipo[resultado[2]].append(resultado)
+
+        incompletos = {tipo for tipo, lista in por_tipo.items() if len(lista) >= limite}
+        novos = {tipo: [] for tipo in MODELOS_BUSCA}
+        for resultado in resultados_compactos(termo, limite=limite, tipos=incompletos) if incompletos else []:
+            novos[resultado[2]].append(resultado)
+        for tipo, lista in por_tipo.items():
+            if tipo in incompletos:
+                continue
+            ranks = {r: _rank(tokens, principal, tokenizar(r[1]), r[1]) for r in lista}
+            novos[tipo] = sorted((r for r in lista if ranks[r] is not None), key=ranks.get)[:limite]
+        return [resultado for tipo in MODELOS_BUSCA for resultado in novos[tipo]]
+
+    def invalidar(self, tipo, objeto):
+        """Descarta termos que listavam o objeto ou que passam a encontrá-lo pelo nome atual."""
+        tokens = tokenizar(getattr(objeto, 'nome', ''))
+        with self._lock:
+            for chave, (_, resultados) in list(self._entradas.items()):
+                if any(r[0] == objeto.pk and r[2] == tipo for r in resultados) or all(
+                    any(t.startswith(q) for t in tokens) for q in chave[0].split()
+                ):
+                    del self._entradas[chave]
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+autocomplete = CacheAutocomplete(
+    max_entradas=getattr(settings, 'BUSCA_CACHE_MAX_ENTRADAS', 2048),
+    ttl=getattr(settings, 'BUSCA_CACHE_TTL', 60),
+)
+
+
+def filtrar_por_termo(queryset, tipo, termo):
+    """Restringe um queryset do modelo aos objetos cujo nome casa com todas as palavras do termo (por prefixo)."""
+    for token in tokenizar(termo):
+        queryset = queryset.filter(
+            id__in=IndiceBusca.objects.filter(tipo=tipo, **_prefixo(token)).values('objeto_id')
+        )
+    return queryset
@@ -0,0 +1,198 @@
+"""
+Seleção de campos pela query string (?fields= / ?expand=) nos ModelSerializers.
+
+O serializer descarta os campos não pedidos e o viewset leva a mesma seleção
+para a consulta: .only() nas colunas usadas, select_related nas relações lidas
+e prefetch só das listas aninhadas que foram expandidas.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _nomes(valor):
+    return {nome.strip() for nome in valor.split(',') if nome.strip()} if valor else set()
+
+
+class CamposDinamicosMixin:
+    """
+    ?fields=id,nome mantém só os campos pedidos; ?expand=clube troca o id da
+    relação pelo objeto aninhado. As expansões aceitas ficam em
+    Meta.expansiveis ({campo: (SerializerClass, kwargs)}); as que não são
+    chave estrangeira só aparecem quando expandidas.
+    Meta.colunas_calculadas diz quais colunas um SerializerMethodField lê.
+    Só o serializer da raiz lê a query string, e só em GET.
+    """
+
+    def _raiz(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def _selecao(self):
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD') or not self._raiz():
+            return None, set()
+        params = getattr(request, 'query_params', request.GET)
+        return _nomes(params.get('fields')) or None, _nomes(params.get('expand'))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expansiveis = getattr(self.Meta, 'expansiveis', {})
+        selecao, expandir = self._selecao()
+        # Pedir em ?fields= um campo que só existe expandido já o expande
+        expandir |= {nome for nome in selecao or () if nome in expansiveis and nome not in fields}
+
+        invalidos = expandir - set(expansiveis)
+        if invalidos:
+            raise serializers.ValidationError(
+                {"expand": f"Expansões inválidas: {', '.join(sorted(invalidos))}. Disponíveis: {', '.join(expansiveis)}"}
+            )
+        for nome, (classe, kwargs) in expansiveis.items():
+            if nome in expandir:
+                fields[nome] = classe(read_only=True, **kwargs)
+
+        if selecao is not None:
+            invalidos = selecao - set(fields)
+            if invalidos:
+                raise serializers.ValidationError(
+                    {"fields": f"Campos inválidos: {', '.join(sorted(invalidos))}. Disponíveis: {', '.join(fields)}"}
+                )
+            # O que foi expandido vai junto mesmo fora de ?fields=
+            fields = {nome: campo for nome, campo in fields.items() if nome in selecao or nome in expandir}
+        return fields
+
+    def otimizar_queryset(self, queryset, colunas_extras=()):
+        """O queryset carregando só o que os campos escolhidos leem. `colunas_extras`: ordenação do cursor etc."""
+        colunas, relacionados, prefetches = _carregamento(self)
+        if relacionados:
+            queryset = queryset.select_related(*relacionados)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        if colunas is not None:
+            # select_related que a view já tinha também precisa da chave estrangeira carregada
+            queryset = queryset.only(*colunas, *colunas_extras, *_caminhos_select_related(queryset.query.select_related))
+        return queryset
+
+
+def _caminhos_select_related(arvore, prefixo=''):
+    if not isinstance(arvore, dict):
+        return []
+    caminhos = []
+    for nome, filhos in arvore.items():
+        caminhos.append(prefixo + nome)
+        caminhos += _caminhos_select_related(filhos, prefixo + nome + '__')
+    return caminhos
+
+
+def _caminho(modelo, source):
+    """Colunas e relações (no formato do ORM) para um source como 'autor.nome'; None se não for só campos concretos."""
+    partes = source.split('.')
+    colunas, relacionados = [], []
+    for indice, parte in enumerate(partes):
+        try:
+            campo = modelo._meta.get_field(parte)
+        except FieldDoesNotExist:
+            return None
+        if not campo.concrete or campo.many_to_many:
+            return None
+        caminho = '__'.join(partes[:indice + 1])
+        colunas.append(caminho)
+        if indice < len(partes) - 1:
+            if not campo.is_relation:
+                return None
+            relacionados.append(caminho)
+            modelo = campo.related_model
+    return colunas, relacionados
+
+
+def _carregamento(serializer, prefixo=''):
+    """(colunas para .only() ou None, caminhos de select_related, Prefetches) dos campos do serializer."""
+    modelo = serializer.Meta.model
+    colunas = {prefixo + modelo._meta.pk.name}
+    relacionados = set()
+    prefetches = []
+    restringir = True
+    calculadas = getattr(serializer.Meta, 'colunas_calculadas', {})
+
+    for nome, campo in serializer.fields.items():
+        if isinstance(campo, serializers.ListSerializer):
+            # Lista aninhada (ex.: gols da partida): só é prefetchada quando o campo está na resposta
+            _, sub_relacionados, sub_prefetches = _carregamento(campo.child)
+            filhos = campo.child.Meta.model.objects.select_related(*sub_relacionados).prefetch_related(*sub_prefetches)
+            prefetches.append(Prefetch(prefixo + campo.source, queryset=filhos))
+            continue
+        if isinstance(campo, serializers.BaseSerializer):
+            # Relação expandida: vem no mesmo SELECT
+            caminho = prefixo + campo.source.replace('.', '__')
+            sub_colunas, sub_relacionados, sub_prefetches = _carregamento(campo, caminho + '__')
+            relacionados |= {caminho, *sub_relacionados}
+            prefetches += sub_prefetches
+            colunas.add(caminho)
+            if sub_colunas is None:
+                restringir = False
+            else:
+                colunas |= sub_colunas
+            continue
+
+        if isinstance(campo, serializers.SerializerMethodField):
+            if nome not in calculadas:
+                restringir = False
+            colunas |= {prefixo + coluna for coluna in calculadas.get(nome, ())}
+            continue
+        caminho = _caminho(modelo, campo.source) if campo.source != '*' else None
+        if caminho is None:
+            restringir = False
+            continue
+        colunas |= {prefixo + coluna for coluna in caminho[0]}
+        relacionados |= {prefixo + relacao for relacao in caminho[1]}
+
+    return (colunas if restringir else None), relacionados, prefetches
+
+
+def _modelos(serializer):
+    """Modelos lidos pelos campos do serializer: o dele, os dos aninhados e os de sources como 'autor.nome'."""
+    modelo = serializer.Meta.model
+    modelos = {modelo}
+    for campo in serializer.fields.values():
+        if isinstance(campo, serializers.ListSerializer):
+            modelos |= _modelos(campo.child)
+        elif isinstance(campo, serializers.BaseSerializer):
+            modelos |= _modelos(campo)
+        elif campo.source != '*':
+            atual = modelo
+            for parte in campo.source.split('.')[:-1]:
+                try:
+                    relacao = atual._meta.get_field(parte)
+                except FieldDoesNotExist:
+                    break
+                if not relacao.is_relation:
+                    break
+                atual = relacao.related_model
+                modelos.add(atual)
+    return modelos
+
+
+class CamposDinamicosViewSetMixin:
+    """
+    Aplica a seleção do serializer (CamposDinamicosMixin) à consulta do list/retrieve.
+    Com GetCondicionalMixin (que deve vir depois nas bases), o validador também
+    acompanha os modelos que a seleção embute, como o clube de ?expand=clube.
+    """
+
+    def get_modelos_condicionais(self):
+        modelos = super().get_modelos_condicionais()
+        if modelos is None or self.request.method not in ('GET', 'HEAD'):
+            return modelos
+        # Ordem estável: a lista entra no ETag
+        return sorted({*modelos, *_modelos(self.get_serializer())}, key=lambda modelo: modelo._meta.label_lower)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in ('GET', 'HEAD'):
+            return queryset
+        # A paginação por cursor lê os campos de ordenação dos objetos da página
+        ordenacao = [campo for campo in queryset.query.order_by if isinstance(campo, str)]
+        if self.paginator is not None and hasattr(self.paginator, 'get_ordering'):
+            ordenacao += self.paginator.get_ordering(self.request, queryset, self)
+        colunas = {campo.lstrip('-') for campo in ordenacao} - {'pk', '?'}
+        return self.get_serializer().otimizar_queryset(queryset, sorted(colunas))
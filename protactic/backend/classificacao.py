@@ -0,0 +1,79 @@
+from collections import deque
+
+from django.core.cache import cache
+
+from .condicional import assinatura
+from .db import banco_analitico
+from .estatisticas import CAMPOS_ESTATISTICA, contribuicao
+from .models import Partida
+
+# Critérios de desempate aceitos em ?criterios= e se a ordem é decrescente
+CRITERIOS = {
+    'pontos': True,
+    'vitorias': True,
+    'saldo': True,
+    'gols_pro': True,
+    'empates': True,
+    'gols_contra': False,
+    'derrotas': False,
+}
+CRITERIOS_PADRAO = ('pontos', 'vitorias', 'saldo', 'gols_pro')
+TAMANHO_FORMA = 5
+
+
+# A chave leva o contador de alteração das partidas (ver condicional.py), que
+# qualquer processo troca depois do commit; a validade só libera memória
+CLASSIFICACAO_TTL = 3600
+
+
+def _chave(competicao_id):
+    return f"classificacao:{competicao_id}:{assinatura(Partida)}"
+
+
+def calcular_classificacao(competicao_id):
+    """Linhas da tabela por clube_id, em uma única passada pelas partidas da competição."""
+    linhas = {}
+    partidas = Partida.objects.using(banco_analitico()).filter(competicao_id=competicao_id).order_by('data_hora', 'id').values_list(
+        'mandante_id', 'visitante_id', 'placar_mandante', 'placar_visitante'
+    )
+    for mandante_id, visitante_id, placar_mandante, placar_visitante in partidas:
+        for clube_id, pro, contra in (
+            (mandante_id, placar_mandante, placar_visitante),
+            (visitante_id, placar_visitante, placar_mandante),
+        ):
+            linha = linhas.get(clube_id)
+            if linha is None:
+                linha = linhas[clube_id] = dict.fromkeys(CAMPOS_ESTATISTICA, 0)
+                linha['forma'] = deque(maxlen=TAMANHO_FORMA)
+            valores = contribuicao(pro, contra)
+            for campo, valor in valores.items():
+                linha[campo] += valor
+            linha['forma'].append('V' if valores['vitorias'] else ('E' if valores['empates'] else 'D'))
+
+    for linha in linhas.values():
+        linha['saldo'] = linha['gols_pro'] - linha['gols_contra']
+        # Mais recente primeiro, como no histórico do dashboard
+        linha['forma'] = list(reversed(linha['forma']))
+    return linhas
+
+
+def obter_classificacao(competicao_id):
+    """Versão em cache de calcular_classificacao, válida até alguma partida mudar."""
+    # A chave é lida antes do cálculo: se uma gravação trocar o contador no meio, o
+    # resultado fica guardado numa chave que ninguém mais consulta
+    chave = _chave(competicao_id)
+    linhas = cache.get(chave)
+    if linhas is None:
+        linhas = calcular_classificacao(competicao_id)
+        cache.set(chave, linhas, CLASSIFICACAO_TTL)
+    return linhas
+
+
+def ordenar_classificacao(linhas, nomes, criterios=CRITERIOS_PADRAO):
+    """Ordena {clube_id: linha} pelos critérios informados, com o nome do clube como último desempate."""
+    def chave(item):
+        clube_id, linha = item
+        valores = tuple(-linha[c] if CRITERIOS[c] else linha[c] for c in criterios)
+        return valores + (nomes.get(clube_id, ''),)
+
+    return sorted(linhas.items(), key=chave)
@@ -0,0 +1,173 @@
+"""
+GET condicional (ETag / Last-Modified) para as telas que o frontend consulta em polling.
+
+Cada modelo tem um contador de alteração no banco (ContadorAlteracao), com a
+versão e o instante da última gravação. Os sinais de save/delete e os caminhos
+em lote (update, bulk_create, _raw_delete), que não disparam sinais, chamam
+marcar_alteracao. O validador de uma resposta sai só desses contadores, da URL
+e do usuário: um 304 custa uma consulta indexada, sem executar a view nem
+serializar nada, e vale igual para todos os workers e comandos de gerenciamento.
+"""
+import hashlib
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import ContadorAlteracao
+
+# Contadores já lidos no GET condicional em andamento. As caches que derivam
+# chaves deles (rankings) reaproveitam os valores do validador, sem nova
+# consulta, e a resposta fica sempre coerente com o ETag
+_lidos = ContextVar('contadores_lidos', default=None)
+
+
+def _nome(modelo):
+    return modelo._meta.label_lower
+
+
+def _gravar(nomes):
+    agora = timezone.now()
+    atualizados = ContadorAlteracao.objects.filter(modelo__in=nomes).update(versao=F('versao') + 1, alterado_em=agora)
+    if atualizados < len(nomes):
+        # Primeira alteração do modelo; se outro processo criou a linha antes, a versão dele já mudou o validador
+        ContadorAlteracao.objects.bulk_create(
+            [ContadorAlteracao(modelo=nome, versao=1, alterado_em=agora) for nome in nomes], ignore_conflicts=True
+        )
+
+
+class _Pendentes:
+    """Modelos alterados na transação em andamento, gravados por um único on_commit."""
+
+    def __init__(self):
+        self.nomes = set()
+
+    def __call__(self):
+        _gravar(sorted(self.nomes))
+
+
+def marcar_alteracao(*modelos):
+    """Registra que os modelos mudaram. Dentro de uma transação, só vale depois do commit."""
+    nomes = {_nome(modelo) for modelo in modelos}
+    conexao = transaction.get_connection()
+    if not conexao.in_atomic_block:
+        transaction.on_commit(lambda: _gravar(sorted(nomes)))
+        return
+    # Um save por linha dispara um sinal por linha: todos os do mesmo bloco atomic
+    # (mesmos savepoints) entram no mesmo UPDATE. Se um rollback descartou o
+    # callback, ou o bloco é outro, começa um novo
+    pendentes = getattr(conexao, '_alteracoes_pendentes', None)
+    savepoints = set(conexao.savepoint_ids)
+    if pendentes is None or not any(
+        funcao is pendentes and sids == savepoints for sids, funcao, _ in conexao.run_on_commit
+    ):
+        pendentes = conexao._alteracoes_pendentes = _Pendentes()
+        # Antes do commit um GET ainda lê os dados antigos e os guardaria com o validador novo
+        transaction.on_commit(pendentes)
+    pendentes.nomes |= nomes
+
+
+def versoes(modelos):
+    """(versão, instante da última alteração) de cada modelo; sem contador, (0, None)."""
+    nomes = [_nome(modelo) for modelo in modelos]
+    lidos = _lidos.get()
+    conhecidos = dict(lidos or {})
+    faltando = [nome for nome in nomes if nome not in conhecidos]
+    if faltando:
+        atuais = {
+            modelo: (versao, alterado_em)
+            for modelo, versao, alterado_em in ContadorAlteracao.objects.filter(modelo__in=faltando).values_list(
+                'modelo', 'versao', 'alterado_em'
+            )
+        }
+        novos = {nome: atuais.get(nome, (0, None)) for nome in faltando}
+        conhecidos.update(novos)
+        if lidos is not None:
+            lidos.update(novos)
+    return [conhecidos[nome] for nome in nomes]
+
+
+def assinatura(*modelos):
+    """Versões dos modelos numa string, para chaves de cache que mudam junto com os validadores."""
+    return '.'.join(str(versao) for versao, _ in versoes(modelos))
+
+
+def _versao_usuario(user):
+    # UsuarioToken carrega a versão no token; o User do banco tem o campo
+    token = getattr(user, 'token', None)
+    if token is not None:
+        return token.get('versao')
+    return getattr(user, 'versao_token', None)
+
+
+class NaoModificado(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class GetCondicionalMixin:
+    """
+    ETag e Last-Modified nos GETs de uma APIView/ViewSet, a partir de `modelos_condicionais`.
+
+    A conferência roda em initial(), depois da autenticação e das permissões e
+    antes do handler: com If-None-Match/If-Modified-Since batendo, devolve 304
+    sem executar a view. O validador inclui a URL completa e o usuário, porque
+    as respostas variam com os filtros e com o escopo do treinador.
+    """
+    modelos_condicionais = None
+
+    def get_modelos_condicionais(self):
+        """Modelos que compõem a resposta; None desliga o GET condicional."""
+        return self.modelos_condicionais
+
+    def validador(self, request, modelos):
+        versoes_modelos = versoes(modelos)
+        user = request.user
+        partes = [request.get_full_path(), user.pk, _versao_usuario(user), *(versao for versao, _ in versoes_modelos)]
+        etag = 'W/"%s"' % hashlib.sha1(repr(partes).encode()).hexdigest()[:32]
+        # Sem modelos (ex.: navegação) ou sem nenhuma alteração registrada a resposta só tem ETag
+        instantes = [alterado_em for _, alterado_em in versoes_modelos if alterado_em is not None]
+        ultima = int(max(instantes).timestamp()) if instantes else None
+        return etag, ultima
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validadores = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        self._token_lidos = _lidos.set({})
+        modelos = self.get_modelos_condicionais()
+        if modelos is None:
+            return
+        self.validadores = self.validador(request, modelos)
+        response = get_conditional_response(request, *self.validadores)
+        if response is not None:
+            raise NaoModificado(self._cabecalhos(response))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NaoModificado):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'validadores', None) and response.status_code == 200:
+            self._cabecalhos(response)
+        token = getattr(self, '_token_lidos', None)
+        if token is not None:
+            _lidos.reset(token)
+            self._token_lidos = None
+        return response
+
+    def _cabecalhos(self, response):
+        etag, ultima = self.validadores
+        response['ETag'] = etag
+        if ultima is not None:
+            response['Last-Modified'] = http_date(ultima)
+        # Cada cliente guarda a sua cópia e sempre revalida antes de usar
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
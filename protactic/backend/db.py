@@ -0,0 +1,21 @@
+from django.conf import settings
+
+ALIAS_LEITURA = 'leitura'
+
+
+def banco_analitico():
+    """Alias para leituras analíticas longas: a conexão somente leitura, se configurada."""
+    return ALIAS_LEITURA if ALIAS_LEITURA in settings.DATABASES else 'default'
+
+
+class RoteadorLeitura:
+    """Escritas e migrações sempre no default; a conexão de leitura só é usada via .using()."""
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != ALIAS_LEITURA
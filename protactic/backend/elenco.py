@@ -0,0 +1,84 @@
+from collections import defaultdict
+from itertools import accumulate
+
+from django.db.models import Count, Q
+
+from .db import banco_analitico
+from .models import Desempenho, Escalacao, Gol
+
+JANELAS_PADRAO = (3, 5, 10)
+PONTOS_SERIE = 10
+
+
+def medias_moveis(valores, janela):
+    """Média dos últimos `janela` valores em cada ponto da série, via somas acumuladas (O(n))."""
+    somas = [0.0, *accumulate(valores)]
+    return [
+        (somas[i + 1] - somas[max(0, i + 1 - janela)]) / min(janela, i + 1)
+        for i in range(len(valores))
+    ]
+
+
+def _media(valores):
+    return round(sum(valores) / len(valores), 2) if valores else None
+
+
+def _contagens(queryset, campo, temporada):
+    linhas = queryset.values(campo).annotate(
+        carreira=Count('id'),
+        temporada=Count('id', filter=Q(partida__data_hora__year=temporada)),
+    ).values_list(campo, 'carreira', 'temporada')
+    return {jogador_id: (carreira, na_temporada) for jogador_id, carreira, na_temporada in linhas}
+
+
+def estatisticas_jogadores(jogador_ids, temporada, janelas=JANELAS_PADRAO):
+    """
+    Agregados de temporada e carreira de vários jogadores de uma vez.
+
+    São quatro queries independentemente do tamanho do elenco: notas (em ordem
+    cronológica, para as médias móveis), gols, assistências e titularidades.
+    """
+    notas = defaultdict(list)
+    notas_temporada = defaultdict(list)
+    banco = banco_analitico()
+    desempenhos = Desempenho.objects.using(banco).filter(jogador_id__in=jogador_ids, nota__isnull=False).order_by(
+        'jogador_id', 'partida__data_hora', 'partida_id'
+    ).values_list('jogador_id', 'nota', 'partida__data_hora')
+    for jogador_id, nota, data_hora in desempenhos:
+        notas[jogador_id].append(float(nota))
+        if data_hora.year == temporada:
+            notas_temporada[jogador_id].append(float(nota))
+
+    gols = _contagens(Gol.objects.using(banco).filter(autor_id__in=jogador_ids, contra=False), 'autor', temporada)
+    assistencias = _contagens(Gol.objects.using(banco).filter(assistencia_id__in=jogador_ids, contra=False), 'assistencia', temporada)
+    titular = _contagens(Escalacao.objects.using(banco).filter(jogador_id__in=jogador_ids, status='TITULAR'), 'jogador', temporada)
+
+    resultado = {}
+    for jogador_id in jogador_ids:
+        serie = notas.get(jogador_id, [])
+        forma = {}
+        for janela in janelas:
+            moveis = medias_moveis(serie, janela)
+            forma[str(janela)] = {
+                "media": round(moveis[-1], 2) if moveis else None,
+                "serie": [round(m, 2) for m in moveis[-PONTOS_SERIE:]],
+            }
+        resultado[jogador_id] = {
+            "temporada": {
+                "ano": temporada,
+                "jogos_avaliados": len(notas_temporada.get(jogador_id, [])),
+                "media_nota": _media(notas_temporada.get(jogador_id, [])),
+                "gols": gols.get(jogador_id, (0, 0))[1],
+                "assistencias": assistencias.get(jogador_id, (0, 0))[1],
+                "jogos_titular": titular.get(jogador_id, (0, 0))[1],
+            },
+            "carreira": {
+                "jogos_avaliados": len(serie),
+                "media_nota": _media(serie),
+                "gols": gols.get(jogador_id, (0, 0))[0],
+                "assistencias": assistencias.get(jogador_id, (0, 0))[0],
+                "jogos_titular": titular.get(jogador_id, (0, 0))[0],
+            },
+            "forma": forma,
+        }
+    return resultado
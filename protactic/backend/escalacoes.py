@@ -0,0 +1,58 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import tempo_real
+from .condicional import marcar_alteracao
+from .models import Escalacao
+
+TAMANHO_LOTE = 500
+
+
+def escalacoes_no_escopo(partida_id=None, clube_id=None, inicio=None, fim=None):
+    """Escalações de uma partida, de um clube e/ou de partidas entre as datas `inicio` e `fim` (inclusive)."""
+    queryset = Escalacao.objects.all()
+    if partida_id is not None:
+        queryset = queryset.filter(partida_id=partida_id)
+    if clube_id is not None:
+        queryset = queryset.filter(clube_id=clube_id)
+    # Limites em datetime (e não __date) para a consulta usar o índice de data_hora
+    fuso = timezone.get_current_timezone()
+    if inicio is not None:
+        queryset = queryset.filter(partida__data_hora__gte=datetime.combine(inicio, time.min, tzinfo=fuso))
+    if fim is not None:
+        queryset = queryset.filter(partida__data_hora__lt=datetime.combine(fim + timedelta(days=1), time.min, tzinfo=fuso))
+    return queryset
+
+
+def resetar_escalacoes(queryset, tamanho_lote=TAMANHO_LOTE, progresso=None):
+    """
+    Apaga as escalações do queryset em lotes de `tamanho_lote`, cada um na sua transação.
+
+    Usa DELETE direto por id, sem carregar objetos nem coletar cascata (nada
+    referencia Escalacao), então o banco fica travado só pelo tempo de um lote.
+    Como os sinais não disparam, publica no tempo real a escalação vazia de cada
+    clube afetado e marca a alteração para o GET condicional. `progresso(removidas, total)` é chamado depois de cada lote.
+    """
+    total = queryset.count()
+    removidas = 0
+    lotes = 0
+    ultimo_id = 0
+    while True:
+        with transaction.atomic():
+            lote = list(
+                queryset.filter(id__gt=ultimo_id).order_by('id').values_list('id', 'partida_id', 'clube_id')[:tamanho_lote]
+            )
+            if not lote:
+                break
+            ids = [escalacao_id for escalacao_id, _, _ in lote]
+            removidas += Escalacao.objects.filter(id__in=ids)._raw_delete(Escalacao.objects.db)
+            marcar_alteracao(Escalacao)
+            for partida_id, clube_id in {(partida_id, clube_id) for _, partida_id, clube_id in lote}:
+                tempo_real.publicar(partida_id, 'escalacao', clube=clube_id, escalacao=[])
+        ultimo_id = ids[-1]
+        lotes += 1
+        if progresso:
+            progresso(removidas, total)
+    return {'removidas': removidas, 'lotes': lotes}
@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from .condicional import marcar_alteracao
+from .models import EstatisticaClube, Partida
+
+CAMPOS_PARTIDA = ('competicao_id', 'mandante_id', 'visitante_id', 'placar_mandante', 'placar_visitante')
+CAMPOS_ESTATISTICA = ('jogos', 'vitorias', 'empates', 'derrotas', 'gols_pro', 'gols_contra', 'pontos')
+
+
+def estado_partida(partida):
+    """Tupla com tudo o que uma partida contribui para a tabela de estatísticas."""
+    return tuple(getattr(partida, campo) for campo in CAMPOS_PARTIDA)
+
+
+def contribuicao(gols_pro, gols_contra):
+    """Contribuição de um resultado para uma linha de EstatisticaClube."""
+    vitoria = gols_pro > gols_contra
+    empate = gols_pro == gols_contra
+    return {
+        'jogos': 1,
+        'vitorias': int(vitoria),
+        'empates': int(empate),
+        'derrotas': int(not vitoria and not empate),
+        'gols_pro': gols_pro,
+        'gols_contra': gols_contra,
+        'pontos': 3 if vitoria else (1 if empate else 0),
+    }
+
+
+def _lados(estado):
+    competicao_id, mandante_id, visitante_id, placar_mandante, placar_visitante = estado
+    yield competicao_id, mandante_id, contribuicao(placar_mandante, placar_visitante)
+    yield competicao_id, visitante_id, contribuicao(placar_visitante, placar_mandante)
+
+
+def aplicar(estado, sinal):
+    """Soma (sinal=1) ou remove (sinal=-1) a contribuição de uma partida via F()."""
+    with transaction.atomic():
+        for competicao_id, clube_id, valores in _lados(estado):
+            if sinal > 0:
+                EstatisticaClube.objects.get_or_create(clube_id=clube_id, competicao_id=competicao_id)
+            # Remoções só atualizam linhas existentes: durante o cascade de um
+            # Clube a linha pode já ter sido apagada e não deve ser recriada.
+            EstatisticaClube.objects.filter(clube_id=clube_id, competicao_id=competicao_id).update(
+                **{campo: F(campo) + sinal * valor for campo, valor in valores.items()}
+            )
+
+
+def mover_para_sem_competicao(competicao_id):
+    """Competicao apagada: as partidas viram SET_NULL, então as linhas migram para competicao=None."""
+    with transaction.atomic():
+        for linha in EstatisticaClube.objects.filter(competicao_id=competicao_id):
+            EstatisticaClube.objects.get_or_create(clube_id=linha.clube_id, competicao_id=None)
+            EstatisticaClube.objects.filter(clube_id=linha.clube_id, competicao__isnull=True).update(
+                **{campo: F(campo) + getattr(linha, campo) for campo in CAMPOS_ESTATISTICA}
+            )
+
+
+def calcular_estatisticas():
+    """Agregado ao vivo a partir de Partida: {(clube_id, competicao_id): {campo: valor}}."""
+    totais = defaultdict(lambda: dict.fromkeys(CAMPOS_ESTATISTICA, 0))
+    for estado in Partida.objects.values_list(*CAMPOS_PARTIDA).iterator():
+        for competicao_id, clube_id, valores in _lados(estado):
+            linha = totais[(clube_id, competicao_id)]
+            for campo, valor in valores.items():
+                linha[campo] += valor
+    return totais
+
+
+def recalcular_estatisticas():
+    """Reconstrói EstatisticaClube do zero. Retorna o número de linhas gravadas."""
+    totais = calcular_estatisticas()
+    with transaction.atomic():
+        EstatisticaClube.objects.all().delete()
+        EstatisticaClube.objects.bulk_create(
+            [
+                EstatisticaClube(clube_id=clube_id, competicao_id=competicao_id, **valores)
+                for (clube_id, competicao_id), valores in totais.items()
+            ],
+            batch_size=500,
+        )
+        marcar_alteracao(EstatisticaClube)
+    return len(totais)
+
+
+def divergencias_estatisticas():
+    """Compara a tabela com o agregado ao vivo e lista as chaves que não batem."""
+    esperado = calcular_estatisticas()
+    atual = {
+        (linha['clube_id'], linha['competicao_id']): {campo: linha[campo] for campo in CAMPOS_ESTATISTICA}
+        for linha in EstatisticaClube.objects.values('clube_id', 'competicao_id', *CAMPOS_ESTATISTICA)
+    }
+    vazio = dict.fromkeys(CAMPOS_ESTATISTICA, 0)
+    divergentes = []
+    for chave in set(esperado) | set(atual):
+        if esperado.get(chave, vazio) != atual.get(chave, vazio):
+            divergentes.append((chave, esperado.get(chave, vazio), atual.get(chave, vazio)))
+    return divergentes
@@ -0,0 +1,106 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+
+from . import estatisticas, tempo_real
+from .condicional import marcar_alteracao
+from .models import EstatisticaClube, Gol, Jogador, Partida
+
+
+class EventoInvalido(Exception):
+    def __init__(self, erros):
+        super().__init__(erros)
+        self.erros = erros
+
+
+def erro_gol(partida, autor_clube, clube_id=None):
+    """Motivo para recusar um gol do autor (clube atual) pelo lado `clube_id` (padrão: o do autor); None se válido."""
+    lados = (partida.mandante_id, partida.visitante_id)
+    if autor_clube not in lados:
+        return "O autor não joga por nenhum dos clubes da partida"
+    if (clube_id or autor_clube) not in lados:
+        return "O clube do gol não joga esta partida"
+    return None
+
+
+def _validar(partida, eventos):
+    """Valida o lote em memória, com uma query para jogadores e outra para gols."""
+    lados = (partida.mandante_id, partida.visitante_id)
+    jogador_ids = {e[c] for e in eventos for c in ('autor', 'assistencia') if e.get(c)}
+    clubes_jogadores = dict(Jogador.objects.filter(id__in=jogador_ids).values_list('id', 'clube_id'))
+    gol_ids = [e['gol'] for e in eventos if e['tipo'] == 'remover_gol']
+    gols = Gol.objects.select_related('autor').in_bulk(gol_ids)
+
+    erros = {}
+    for indice, evento in enumerate(eventos):
+        if evento['tipo'] == 'gol':
+            erro = erro_gol(partida, clubes_jogadores.get(evento['autor']), evento.get('clube'))
+            if evento['autor'] not in clubes_jogadores:
+                erros[indice] = "Autor não encontrado"
+            elif erro:
+                erros[indice] = erro
+            elif evento.get('assistencia') and evento['assistencia'] not in clubes_jogadores:
+                erros[indice] = "Jogador da assistência não encontrado"
+        else:
+            gol = gols.get(evento['gol'])
+            if gol is None or gol.partida_id != partida.id:
+                erros[indice] = "Gol não encontrado nesta partida"
+            elif (gol.clube_id or gol.autor.clube_id) not in lados:
+                erros[indice] = "Não foi possível identificar o lado do gol no placar"
+    if len(set(gol_ids)) != len(gol_ids):
+        erros['gol'] = "O mesmo gol aparece mais de uma vez no lote"
+    if erros:
+        raise EventoInvalido(erros)
+    return clubes_jogadores, gols
+
+
+def registrar_eventos(partida_id, eventos):
+    """
+    Aplica um lote de eventos (gols e remoções de gol) de uma vez.
+
+    Os gols são gravados e o placar muda com um único UPDATE ... SET placar = placar + n
+    na mesma transação, então operadores simultâneos não sobrescrevem um ao outro.
+    Retorna (gols criados, placar final).
+    """
+    with transaction.atomic():
+        partida = Partida.objects.select_for_update().get(pk=partida_id)
+        clubes_jogadores, gols = _validar(partida, eventos)
+
+        delta = Counter()
+        criados = []
+        for evento in eventos:
+            if evento['tipo'] == 'gol':
+                clube_id = evento.get('clube') or clubes_jogadores[evento['autor']]
+                criados.append(Gol.objects.create(
+                    partida_id=partida.id,
+                    autor_id=evento['autor'],
+                    assistencia_id=evento.get('assistencia'),
+                    minuto=evento.get('minuto'),
+                    clube_id=clube_id,
+                    contra=clube_id != clubes_jogadores[evento['autor']],
+                ))
+                delta[clube_id] += 1
+            else:
+                gol = gols[evento['gol']]
+                delta[gol.clube_id or gol.autor.clube_id] -= 1
+                gol.delete()
+
+        delta_mandante = delta[partida.mandante_id]
+        delta_visitante = delta[partida.visitante_id]
+        if delta_mandante or delta_visitante:
+            Partida.objects.filter(pk=partida.id).update(
+                placar_mandante=F('placar_mandante') + delta_mandante,
+                placar_visitante=F('placar_visitante') + delta_visitante,
+            )
+            # update() não dispara sinais: acerta as estatísticas derivadas a partir do placar gravado
+            novo = Partida.objects.values_list(*estatisticas.CAMPOS_PARTIDA).get(pk=partida.id)
+            anterior = novo[:3] + (novo[3] - delta_mandante, novo[4] - delta_visitante)
+            estatisticas.aplicar(anterior, -1)
+            estatisticas.aplicar(novo, 1)
+            marcar_alteracao(Partida, EstatisticaClube)
+            tempo_real.publicar(partida.id, 'placar', placar_mandante=novo[3], placar_visitante=novo[4])
+        else:
+            novo = Partida.objects.values_list(*estatisticas.CAMPOS_PARTIDA).get(pk=partida.id)
+
+    return criados, {'placar_mandante': novo[3], 'placar_visitante': novo[4]}
@@ -0,0 +1,86 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import Clube, Jogador
+
+# Lado máximo (px) de cada variante gerada, todas em WebP
+TAMANHOS = (64, 128, 256)
+PASTA_VARIANTES = 'variantes'
+QUALIDADE_WEBP = 80
+
+# Campo de imagem de cada modelo e o campo que guarda o hash do conteúdo
+IMAGENS = {
+    Clube: ('escudo', 'escudo_hash'),
+    Jogador: ('foto', 'foto_hash'),
+}
+
+
+def caminho_variante(hash_conteudo, tamanho):
+    """Nome da variante dentro do MEDIA_ROOT. Muda sempre que o conteúdo muda, então pode ser cacheado para sempre."""
+    return f"{PASTA_VARIANTES}/{hash_conteudo[:2]}/{hash_conteudo}_{tamanho}.webp"
+
+
+def gerar_variantes_de_bytes(dados):
+    """
+    Grava as variantes de uma imagem e retorna o hash do conteúdo.
+
+    A orientação do EXIF é aplicada aos pixels e os metadados não são copiados
+    para as variantes. Variantes que já existem (mesmo conteúdo) não são refeitas.
+    """
+    hash_conteudo = hashlib.sha256(dados).hexdigest()[:20]
+    pendentes = [t for t in TAMANHOS if not default_storage.exists(caminho_variante(hash_conteudo, t))]
+    if not pendentes:
+        return hash_conteudo
+
+    with Image.open(BytesIO(dados)) as original:
+        imagem = ImageOps.exif_transpose(original)
+        transparente = imagem.mode in ('RGBA', 'LA', 'PA') or (imagem.mode == 'P' and 'transparency' in imagem.info)
+        imagem = imagem.convert('RGBA' if transparente else 'RGB')
+        for tamanho in pendentes:
+            variante = imagem.copy()
+            variante.thumbnail((tamanho, tamanho), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            variante.save(buffer, 'WEBP', quality=QUALIDADE_WEBP, method=4)
+            default_storage.save(caminho_variante(hash_conteudo, tamanho), ContentFile(buffer.getvalue()))
+    return hash_conteudo
+
+
+def gerar_variantes(arquivo):
+    """
+    Variantes de um FieldFile (inclusive um upload ainda não gravado). Retorna ''
+    se não for imagem válida ou se passar do limite de pixels do Pillow.
+    """
+    arquivo.open('rb')
+    try:
+        dados = arquivo.read()
+    finally:
+        arquivo.seek(0)
+    try:
+        return gerar_variantes_de_bytes(dados)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return ''
+
+
+def processar_arquivo(nome):
+    """Usado pelo pool de processos do comando gerar_variantes: lê do storage e retorna o hash ('' se falhar)."""
+    try:
+        with default_storage.open(nome, 'rb') as arquivo:
+            return gerar_variantes_de_bytes(arquivo.read())
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return ''
+
+
+def urls_variantes(arquivo, hash_conteudo, request=None):
+    """{'original': url, '64': url, ...} para o serializer; None sem imagem."""
+    if not arquivo:
+        return None
+    urls = {'original': arquivo.url}
+    if hash_conteudo:
+        urls.update({str(t): default_storage.url(caminho_variante(hash_conteudo, t)) for t in TAMANHOS})
+    if request is not None:
+        urls = {chave: request.build_absolute_uri(url) for chave, url in urls.items()}
+    return urls
@@ -0,0 +1,214 @@
+import json
+import logging
+import statistics
+import time
+from contextlib import ExitStack
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.autenticacao import UsuarioToken
+from backend.middleware import ContadorQueries
+from backend.models import Clube, Competicao, Jogador, Partida
+
+# Diferença mínima de p95 (ms) para contar como regressão, abaixo disso é ruído
+MARGEM_MS = 1.0
+
+
+def rotas(clube, competicao, partida, jogador):
+    """(nome, url) de cada rota de leitura da API. O SSE de tempo real fica de fora por não terminar."""
+    return [
+        ('navigation', reverse('navigation')),
+        ('clube-list', reverse('clube-list')),
+        ('clube-detail', reverse('clube-detail', args=[clube.pk])),
+        ('clube_dashboard', reverse('clube_dashboard', args=[clube.pk])),
+        ('jogador-list', reverse('jogador-list')),
+        ('jogador-list:filtros', reverse('jogador-list') + f'?clube={clube.pk}&ordering=-idade'),
+        ('jogador-list:search', reverse('jogador-list') + '?search=silva'),
+        ('jogador-detail', reverse('jogador-detail', args=[jogador.pk])),
+        ('jogador_estatisticas', reverse('jogador_estatisticas') + f'?clube={clube.pk}'),
+        ('competicao-list', reverse('competicao-list')),
+        ('competicao-detail', reverse('competicao-detail', args=[competicao.pk])),
+        ('competicao_times', reverse('competicao_times', args=[competicao.pk])),
+        ('competicao_classificacao', reverse('competicao_classificacao', args=[competicao.pk])),
+        ('competicao_clube_stats', reverse('competicao_clube_stats', args=[competicao.pk, clube.pk])),
+        ('ranking', reverse('ranking')),
+        ('ranking_competicao', reverse('ranking_competicao', args=[competicao.pk])),
+        ('ranking_clube', reverse('ranking_clube', args=[clube.pk]) + '?tipo=assistencias'),
+        ('partida-list', reverse('partida-list')),
+        ('partida-detail', reverse('partida-detail', args=[partida.pk])),
+        ('partida_escalacao', reverse('partida_escalacao', args=[partida.pk])),
+        ('gol-list', reverse('gol-list')),
+        ('escalacao-list', reverse('escalacao-list') + f'?partida={partida.pk}'),
+        ('desempenho-list', reverse('desempenho-list') + f'?partida={partida.pk}'),
+        ('busca_global', reverse('busca_global') + '?q=sil'),
+    ]
+
+
+def percentil(ordenadas, p):
+    """Percentil por interpolação linear entre as amostras ordenadas."""
+    if len(ordenadas) == 1:
+        return ordenadas[0]
+    posicao = (len(ordenadas) - 1) * p / 100
+    base = int(posicao)
+    proximo = min(base + 1, len(ordenadas) - 1)
+    return ordenadas[base] + (ordenadas[proximo] - ordenadas[base]) * (posicao - base)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede latência (p50/p95/p99), queries e tamanho de resposta de todas as rotas de leitura "
+        "sobre um conjunto de dados gerado, e compara com um baseline salvo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--competicoes', type=int, default=2)
+        parser.add_argument('--clubes', type=int, default=10)
+        parser.add_argument('--temporadas', type=int, default=1)
+        parser.add_argument('--repeticoes', type=int, default=30)
+        parser.add_argument('--aquecimento', type=int, default=3)
+        parser.add_argument('--rota', action='append', dest='rotas', help="Mede só estas rotas (pode repetir).")
+        parser.add_argument('--saida', help="Grava o resultado em JSON neste arquivo (padrão: stdout).")
+        parser.add_argument('--baseline', help="JSON de uma execução anterior para comparar.")
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help="Aumento relativo de p95 tolerado em relação ao baseline (padrão 0.2).")
+        parser.add_argument('--atualizar-baseline', action='store_true',
+                            help="Sobrescreve o arquivo de --baseline com o resultado desta execução.")
+        parser.add_argument('--banco-atual', action='store_true',
+                            help="Mede sobre o banco configurado em vez de criar um banco de teste com gerar_dados.")
+
+    def handle(self, *args, **opts):
+        if opts['repeticoes'] < 1:
+            raise CommandError("--repeticoes deve ser ao menos 1.")
+        if opts['atualizar_baseline'] and not opts['baseline']:
+            raise CommandError("--atualizar-baseline exige --baseline.")
+
+        # O log por requisição do middleware de métricas poluiria a saída
+        logger = logging.getLogger('backend.metricas')
+        nivel = logger.level
+        logger.setLevel(logging.ERROR)
+        setup_test_environment()
+        runner = None
+        try:
+            if not opts['banco_atual']:
+                runner = DiscoverRunner(verbosity=0)
+                antigos = runner.setup_databases()
+                call_command(
+                    'gerar_dados', seed=opts['seed'], competicoes=opts['competicoes'],
+                    clubes=opts['clubes'], temporadas=opts['temporadas'], stdout=StringIO(),
+                )
+            resultado = self.medir(opts)
+        finally:
+            if runner:
+                runner.teardown_databases(antigos)
+            teardown_test_environment()
+            logger.setLevel(nivel)
+
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if opts['saida']:
+            with open(opts['saida'], 'w', encoding='utf-8') as arquivo:
+                arquivo.write(texto + '\n')
+        else:
+            self.stdout.write(texto)
+
+        if opts['baseline']:
+            if opts['atualizar_baseline']:
+                with open(opts['baseline'], 'w', encoding='utf-8') as arquivo:
+                    arquivo.write(texto + '\n')
+                self.stderr.write(f"Baseline atualizado em {opts['baseline']}.")
+                return
+            self.comparar(resultado, opts['baseline'], opts['tolerancia'])
+
+    def medir(self, opts):
+        clube = Clube.objects.order_by('id').first()
+        competicao = Competicao.objects.order_by('id').first()
+        partida = Partida.objects.order_by('-data_hora', '-id').first()
+        jogador = Jogador.objects.order_by('id').first()
+        if not all((clube, competicao, partida, jogador)):
+            raise CommandError("O banco não tem dados suficientes. Rode gerar_dados antes ou omita --banco-atual.")
+
+        # Administrador só em memória, com as mesmas claims de um token: nada é gravado no banco medido
+        usuario = UsuarioToken({
+            'user_id': 0, 'username': 'benchmark', 'user_type': 'ADMIN', 'clube_id': None,
+            'is_superuser': False, 'is_staff': False,
+        })
+        client = APIClient()
+        client.force_authenticate(usuario)
+
+        medidas = {}
+        for nome, url in rotas(clube, competicao, partida, jogador):
+            if opts['rotas'] and nome not in opts['rotas']:
+                continue
+            for _ in range(opts['aquecimento']):
+                client.get(url)
+
+            tempos = []
+            for _ in range(opts['repeticoes']):
+                contador = ContadorQueries()
+                with ExitStack() as stack:
+                    for conexao in connections.all():
+                        stack.enter_context(conexao.execute_wrapper(contador))
+                    inicio = time.perf_counter()
+                    response = client.get(url)
+                    tempos.append((time.perf_counter() - inicio) * 1000)
+
+            tempos.sort()
+            medidas[nome] = {
+                'url': url,
+                'status': response.status_code,
+                'p50_ms': round(percentil(tempos, 50), 2),
+                'p95_ms': round(percentil(tempos, 95), 2),
+                'p99_ms': round(percentil(tempos, 99), 2),
+                'media_ms': round(statistics.fmean(tempos), 2),
+                'queries': contador.total,
+                'bytes': len(response.content),
+            }
+
+        return {
+            'gerado_em': timezone.now().isoformat(),
+            'configuracao': {
+                chave: opts[chave] for chave in
+                ('seed', 'competicoes', 'clubes', 'temporadas', 'repeticoes', 'aquecimento', 'banco_atual')
+            },
+            'dados': {
+                'clubes': Clube.objects.count(),
+                'jogadores': Jogador.objects.count(),
+                'partidas': Partida.objects.count(),
+            },
+            'rotas': medidas,
+        }
+
+    def comparar(self, resultado, caminho, tolerancia):
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                baseline = json.load(arquivo)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Não foi possível ler o baseline {caminho}: {e}")
+
+        if baseline.get('dados') != resultado['dados']:
+            self.stderr.write(self.style.WARNING("Volume de dados diferente do baseline, a comparação pode não ser justa."))
+
+        regressoes = []
+        for nome, atual in resultado['rotas'].items():
+            anterior = baseline.get('rotas', {}).get(nome)
+            if anterior is None:
+                continue
+            if atual['queries'] > anterior['queries']:
+                regressoes.append(f"{nome}: queries {anterior['queries']} -> {atual['queries']}")
+            limite = anterior['p95_ms'] * (1 + tolerancia)
+            if atual['p95_ms'] > limite and atual['p95_ms'] - anterior['p95_ms'] > MARGEM_MS:
+                regressoes.append(f"{nome}: p95 {anterior['p95_ms']}ms -> {atual['p95_ms']}ms")
+            if atual['status'] != anterior['status']:
+                regressoes.append(f"{nome}: status {anterior['status']} -> {atual['status']}")
+
+        if regressoes:
+            raise CommandError("Regressões em relação ao baseline:\n  " + "\n  ".join(regressoes))
+        self.stderr.write(self.style.SUCCESS(f"Sem regressões em relação a {caminho}."))
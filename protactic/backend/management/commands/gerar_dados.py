@@ -0,0 +1,230 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone as tz
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from backend.busca import reindexar_tudo
+from backend.condicional import marcar_alteracao
+from backend.estatisticas import recalcular_estatisticas
+from backend.models import Clube, Competicao, Desempenho, Escalacao, Gol, Jogador, Partida
+
+PRENOMES = [
+    'João', 'José', 'Lucas', 'Gabriel', 'Pedro', 'Mateus', 'Rafael', 'Bruno', 'Thiago', 'Felipe',
+    'André', 'Caio', 'Vinícius', 'Rodrigo', 'Diego', 'Gustavo', 'Léo', 'Matheus', 'Igor', 'Otávio',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Ferreira', 'Almeida', 'Ribeiro',
+    'Carvalho', 'Gomes', 'Martins', 'Araújo', 'Barbosa', 'Rocha', 'Dias', 'Moreira', 'Nunes', 'Conceição',
+]
+CIDADES = [
+    'São Paulo', 'Rio', 'Belo Horizonte', 'Porto Alegre', 'Curitiba', 'Recife', 'Salvador', 'Fortaleza',
+    'Goiânia', 'Belém', 'Manaus', 'Florianópolis', 'Natal', 'Maceió', 'Cuiabá', 'Vitória',
+]
+SUFIXOS = ['FC', 'EC', 'Atlético', 'Esporte Clube', 'United', 'SC']
+NACIONALIDADES = ['Brasil'] * 8 + ['Argentina', 'Uruguai', 'Colômbia', 'Paraguai']
+
+# Elenco base de 23 posições e a formação 4-4-2 dos titulares (coordenadas em % do campo)
+ELENCO_BASE = (
+    ['Goleiro'] * 3 + ['Zagueiro'] * 4 + ['Lateral Esquerdo'] * 2 + ['Lateral Direito'] * 2
+    + ['Volante'] * 3 + ['Meio-campista'] * 3 + ['Meia Atacante'] * 2 + ['Ponta Esquerda', 'Ponta Direita']
+    + ['Centroavante'] * 2
+)
+FORMACAO = [
+    ('Goleiro', 50, 92),
+    ('Zagueiro', 38, 75), ('Zagueiro', 62, 75), ('Lateral Esquerdo', 15, 68), ('Lateral Direito', 85, 68),
+    ('Volante', 40, 55), ('Meio-campista', 60, 55), ('Ponta Esquerda', 18, 40), ('Ponta Direita', 82, 40),
+    ('Centroavante', 42, 20), ('Meia Atacante', 58, 25),
+]
+GOLS_PESOS = [28, 34, 22, 10, 4, 2]  # 0 a 5 gols por equipe
+CPF_TAMANHO = 14  # max_length de Jogador.cpf
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera um conjunto de dados sintético e determinístico (competições, clubes, jogadores, "
+        "partidas, gols, escalações e notas) em lotes com bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--competicoes', type=int, default=2)
+        parser.add_argument('--clubes', type=int, default=10, help="Clubes por competição.")
+        parser.add_argument('--jogadores-por-clube', type=int, default=23)
+        parser.add_argument('--temporadas', type=int, default=1)
+        parser.add_argument('--ano-inicial', type=int, default=2020)
+        parser.add_argument('--turnos', type=int, choices=(1, 2), default=2)
+        parser.add_argument('--partidas', type=int,
+                            help="Partidas por temporada em cada competição. Por padrão, os turnos completos; "
+                                 "acima disso os confrontos se repetem em novas rodadas.")
+        parser.add_argument('--lote', type=int, default=5000, help="Tamanho dos lotes do bulk_create.")
+        parser.add_argument('--sem-derivados', action='store_true',
+                            help="Não reconstrói estatísticas e índice de busca ao final.")
+
+    def handle(self, *args, **opts):
+        if opts['clubes'] < 2:
+            raise CommandError("São necessários ao menos 2 clubes por competição.")
+        if opts['jogadores_por_clube'] < 18:
+            raise CommandError("Cada clube precisa de ao menos 18 jogadores (11 titulares e 7 reservas).")
+        if opts['partidas'] is not None and opts['partidas'] < 1:
+            raise CommandError("--partidas precisa ser positivo.")
+
+        self.rng = random.Random(opts['seed'])
+        self.lote = opts['lote']
+        # A seed inteira no prefixo (com separador): seeds diferentes nunca dividem os CPFs
+        self.prefixo = f"S{opts['seed']}."
+        total_jogadores = opts['competicoes'] * opts['clubes'] * opts['jogadores_por_clube']
+        self.digitos_cpf = CPF_TAMANHO - len(self.prefixo)
+        if len(str(total_jogadores)) > self.digitos_cpf:
+            raise CommandError("Seed longa demais para o número de jogadores: o CPF gerado passaria de 14 caracteres.")
+        if Jogador.objects.filter(cpf__startswith=self.prefixo).exists():
+            raise CommandError(f"Já existem dados gerados com a seed {opts['seed']}. Use outra --seed.")
+
+        inicio = time.monotonic()
+        self.totais = dict.fromkeys(('competicoes', 'clubes', 'jogadores', 'partidas', 'gols', 'escalacoes', 'desempenhos'), 0)
+
+        for c in range(opts['competicoes']):
+            with transaction.atomic():
+                competicao, clubes, elencos = self.criar_competicao(c, opts)
+            for t in range(opts['temporadas']):
+                with transaction.atomic():
+                    self.criar_temporada(competicao, clubes, elencos, opts['ano_inicial'] + t, opts['turnos'],
+                                         opts['partidas'])
+                self.stdout.write(
+                    f"  {competicao.nome} {opts['ano_inicial'] + t}: {self.totais['partidas']} partidas até agora "
+                    f"({time.monotonic() - inicio:.1f}s)"
+                )
+
+        if not opts['sem_derivados']:
+            self.stdout.write("Reconstruindo estatísticas e índice de busca...")
+            recalcular_estatisticas()
+            reindexar_tudo()
+
+        # bulk_create não dispara sinais. Os contadores no banco trocam os ETags e as
+        # chaves de rankings e classificação também nos servidores em execução; a
+        # busca global deles expira em BUSCA_CACHE_TTL
+        marcar_alteracao(Clube, Competicao, Jogador, Partida, Gol, Escalacao, Desempenho)
+
+        resumo = ', '.join(f"{valor} {nome}" for nome, valor in self.totais.items())
+        self.stdout.write(self.style.SUCCESS(f"Gerados {resumo} em {time.monotonic() - inicio:.1f}s."))
+
+    def criar_competicao(self, indice, opts):
+        rng = self.rng
+        competicao = Competicao.objects.create(
+            nome=f"Liga Sintética {self.prefixo}-{indice + 1}",
+            tamanho='Grande' if opts['clubes'] >= 16 else 'Pequeno',
+            localidade='Brasil',
+            tipo_participantes='Clubes',
+            divisao=str(indice + 1),
+            tipo_formato='Pontos corridos',
+            qtd_participantes=opts['clubes'],
+        )
+        clubes = Clube.objects.bulk_create([
+            Clube(
+                nome=f"{rng.choice(CIDADES)} {rng.choice(SUFIXOS)} {self.prefixo}-{indice + 1}.{i + 1}",
+                pais='Brasil',
+                ano_fundacao=rng.randint(1890, 2015),
+            )
+            for i in range(opts['clubes'])
+        ])
+
+        jogadores = []
+        for clube in clubes:
+            posicoes = (ELENCO_BASE * (opts['jogadores_por_clube'] // len(ELENCO_BASE) + 1))[:opts['jogadores_por_clube']]
+            for posicao in posicoes:
+                self.totais['jogadores'] += 1
+                jogadores.append(Jogador(
+                    nome=f"{rng.choice(PRENOMES)} {rng.choice(SOBRENOMES)}",
+                    cpf=f"{self.prefixo}{self.totais['jogadores']:0{self.digitos_cpf}d}",
+                    idade=rng.randint(17, 36),
+                    peso=round(rng.uniform(62, 92), 1),
+                    altura=round(rng.uniform(1.65, 1.98), 2),
+                    nacionalidade=rng.choice(NACIONALIDADES),
+                    posicao=posicao,
+                    perna=rng.choices(['Destro', 'Canhoto', 'Ambidestro'], [70, 25, 5])[0],
+                    clube=clube,
+                ))
+        Jogador.objects.bulk_create(jogadores, batch_size=self.lote)
+
+        elencos = {clube.id: [] for clube in clubes}
+        for jogador in jogadores:
+            elencos[jogador.clube_id].append(jogador)
+
+        self.totais['competicoes'] += 1
+        self.totais['clubes'] += len(clubes)
+        return competicao, clubes, elencos
+
+    def escalar(self, elenco):
+        """11 titulares na formação e 7 reservas, escolhidos por posição."""
+        disponiveis = list(elenco)
+        self.rng.shuffle(disponiveis)
+        titulares = []
+        for posicao, x, y in FORMACAO:
+            jogador = next((j for j in disponiveis if j.posicao == posicao), disponiveis[0])
+            disponiveis.remove(jogador)
+            titulares.append((jogador, x, y))
+        return titulares, disponiveis[:7]
+
+    def criar_temporada(self, competicao, clubes, elencos, ano, turnos, quantidade=None):
+        rng = self.rng
+        turno = [(m, v) for m in clubes for v in clubes if m.id != v.id]
+        if turnos == 1:
+            turno = [(m, v) for m, v in turno if m.id < v.id]
+        quantidade = quantidade or len(turno)
+        # Cada repetição dos turnos é embaralhada de novo; a última é cortada em `quantidade`
+        confrontos = []
+        while len(confrontos) < quantidade:
+            rodada = list(turno)
+            rng.shuffle(rodada)
+            confrontos += rodada
+        confrontos = confrontos[:quantidade]
+        inicio = datetime(ano, 2, 1, 16, tzinfo=tz.utc)
+
+        partidas = []
+        for i, (mandante, visitante) in enumerate(confrontos):
+            data = inicio + timedelta(days=(i // max(len(clubes) // 2, 1)) * 7 + rng.randint(0, 2), hours=rng.choice([0, 2, 4]))
+            partidas.append(Partida(competicao=competicao, mandante=mandante, visitante=visitante, data_hora=data,
+                                    local=f"Estádio {mandante.nome}"))
+
+        gols, escalacoes, desempenhos = [], [], []
+        for partida in partidas:
+            placar = {}
+            for clube in (partida.mandante, partida.visitante):
+                titulares, reservas = self.escalar(elencos[clube.id])
+                escalacoes.extend(
+                    Escalacao(partida=partida, clube=clube, jogador=j, status='TITULAR',
+                              x=min(max(x + rng.uniform(-4, 4), 0), 100), y=min(max(y + rng.uniform(-4, 4), 0), 100))
+                    for j, x, y in titulares
+                )
+                escalacoes.extend(Escalacao(partida=partida, clube=clube, jogador=j, status='RESERVA') for j in reservas)
+
+                linha = [j for j, _, _ in titulares if j.posicao != 'Goleiro']
+                marcados = rng.choices(range(len(GOLS_PESOS)), GOLS_PESOS)[0]
+                placar[clube.id] = marcados
+                participacoes = {j.id: [0, 0] for j, _, _ in titulares}
+                for _ in range(marcados):
+                    autor = rng.choice(linha)
+                    assistencia = rng.choice([j for j in linha if j is not autor]) if rng.random() < 0.7 else None
+                    participacoes[autor.id][0] += 1
+                    if assistencia:
+                        participacoes[assistencia.id][1] += 1
+                    gols.append(Gol(partida=partida, autor=autor, assistencia=assistencia, minuto=rng.randint(1, 90), clube=clube))
+                desempenhos.extend(
+                    Desempenho(partida=partida, jogador=j, nota=round(min(max(rng.gauss(6.5, 1.1), 0), 10), 1),
+                               gols=participacoes[j.id][0], assistencias=participacoes[j.id][1])
+                    for j, _, _ in titulares
+                )
+            partida.placar_mandante = placar[partida.mandante_id]
+            partida.placar_visitante = placar[partida.visitante_id]
+
+        # Os filhos já apontam para as partidas; o bulk_create delas preenche os partida_id
+        Partida.objects.bulk_create(partidas, batch_size=self.lote)
+        Gol.objects.bulk_create(gols, batch_size=self.lote)
+        Escalacao.objects.bulk_create(escalacoes, batch_size=self.lote)
+        Desempenho.objects.bulk_create(desempenhos, batch_size=self.lote)
+
+        self.totais['partidas'] += len(partidas)
+        self.totais['gols'] += len(gols)
+        self.totais['escalacoes'] += len(escalacoes)
+        self.totais['desempenhos'] += len(desempenhos)
@@ -0,0 +1,44 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.condicional import marcar_alteracao
+from backend.imagens import IMAGENS, processar_arquivo
+
+
+class Command(BaseCommand):
+    help = "Gera as variantes (miniaturas WebP) de escudos e fotos já existentes, em paralelo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processos', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--lote', type=int, default=500, help="Registros por bulk_update do hash.")
+
+    def handle(self, *args, **options):
+        if options['processos'] < 1:
+            raise CommandError("--processos deve ser ao menos 1.")
+
+        falhas = 0
+        # Cada processo filho configura o Django por conta própria (necessário com spawn)
+        with ProcessPoolExecutor(max_workers=options['processos'], initializer=django.setup) as pool:
+            for modelo, (campo, campo_hash) in IMAGENS.items():
+                linhas = list(modelo.objects.exclude(**{f'{campo}__isnull': True}).exclude(**{campo: ''}).values_list('id', campo, campo_hash))
+                hashes = pool.map(processar_arquivo, [nome for _, nome, _ in linhas], chunksize=8)
+
+                alterados = []
+                for (objeto_id, nome, atual), novo in zip(linhas, hashes):
+                    if not novo:
+                        falhas += 1
+                        self.stderr.write(f"{modelo.__name__} {objeto_id}: não foi possível processar {nome}")
+                    elif novo != atual:
+                        alterados.append(modelo(pk=objeto_id, **{campo_hash: novo}))
+                # bulk_update não dispara o pre_save, que refaria as variantes
+                modelo.objects.bulk_update(alterados, [campo_hash], batch_size=options['lote'])
+                if alterados:
+                    marcar_alteracao(modelo)
+                self.stdout.write(f"{modelo.__name__}: {len(linhas)} imagens, {len(alterados)} atualizadas.")
+
+        if falhas:
+            raise CommandError(f"{falhas} imagens não puderam ser processadas.")
+        self.stdout.write(self.style.SUCCESS("Variantes geradas."))
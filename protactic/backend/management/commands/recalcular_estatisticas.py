@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.estatisticas import divergencias_estatisticas, recalcular_estatisticas
+
+
+class Command(BaseCommand):
+    help = "Reconstrói a tabela EstatisticaClube a partir de Partida e confere com o agregado ao vivo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--apenas-verificar',
+            action='store_true',
+            help="Não reconstrói; só compara a tabela atual com o agregado ao vivo.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['apenas_verificar']:
+            linhas = recalcular_estatisticas()
+            self.stdout.write(f"{linhas} linhas de estatística reconstruídas.")
+
+        divergentes = divergencias_estatisticas()
+        for (clube_id, competicao_id), esperado, atual in divergentes:
+            self.stderr.write(
+                f"clube={clube_id} competicao={competicao_id}: esperado {esperado}, encontrado {atual}"
+            )
+        if divergentes:
+            raise CommandError(f"{len(divergentes)} linhas divergem do agregado ao vivo.")
+        self.stdout.write(self.style.SUCCESS("Estatísticas conferem com as partidas."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from backend.busca import reindexar_tudo
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o índice da busca global (jogadores, competições e clubes)."
+
+    def handle(self, *args, **options):
+        total = reindexar_tudo()
+        self.stdout.write(self.style.SUCCESS(f"{total} registros indexados."))
@@ -0,0 +1,37 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.escalacoes import TAMANHO_LOTE, escalacoes_no_escopo, resetar_escalacoes
+
+
+class Command(BaseCommand):
+    help = "Apaga escalações de uma partida, de um clube e/ou de um intervalo de datas, em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partida', type=int)
+        parser.add_argument('--clube', type=int)
+        parser.add_argument('--inicio', type=date.fromisoformat, help="Data inicial (AAAA-MM-DD), inclusive.")
+        parser.add_argument('--fim', type=date.fromisoformat, help="Data final (AAAA-MM-DD), inclusive.")
+        parser.add_argument('--todas', action='store_true', help="Sem escopo: apaga todas as escalações.")
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE)
+
+    def handle(self, *args, **options):
+        escopo = {campo: options[campo] for campo in ('partida', 'clube', 'inicio', 'fim')}
+        if not options['todas'] and all(valor is None for valor in escopo.values()):
+            raise CommandError("Informe --partida, --clube, --inicio/--fim ou --todas.")
+        if options['lote'] < 1:
+            raise CommandError("--lote deve ser ao menos 1.")
+
+        def progresso(removidas, total):
+            self.stdout.write(f"  {removidas}/{total} escalações removidas")
+
+        resultado = resetar_escalacoes(
+            escalacoes_no_escopo(partida_id=escopo['partida'], clube_id=escopo['clube'],
+                                 inicio=escopo['inicio'], fim=escopo['fim']),
+            tamanho_lote=options['lote'],
+            progresso=progresso,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['removidas']} escalações removidas em {resultado['lotes']} lotes."
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.models import Clube, Jogador
+from backend.transferencias import selecionar_jogadores, transferir_jogadores
+
+
+def _lista(valor, tipo=str):
+    return [tipo(v.strip()) for v in valor.split(',') if v.strip()] if valor else []
+
+
+class Command(BaseCommand):
+    help = "Transfere jogadores (por id, CPF ou filtro) para outro clube com um único UPDATE."
+
+    def add_arguments(self, parser):
+        parser.add_argument('destino', type=int, help="Id do clube de destino.")
+        parser.add_argument('--ids', help="Ids separados por vírgula.")
+        parser.add_argument('--cpfs', help="CPFs separados por vírgula.")
+        parser.add_argument('--clube', type=int, help="Todos os jogadores deste clube (ou só os que casam com os demais filtros).")
+        parser.add_argument('--posicao', choices=[p for p, _ in Jogador.POSICOES_CHOICES])
+        parser.add_argument('--idade-max', type=int)
+
+    def handle(self, *args, **options):
+        if not Clube.objects.filter(pk=options['destino']).exists():
+            raise CommandError(f"Clube {options['destino']} não encontrado.")
+        try:
+            ids = _lista(options['ids'], int)
+        except ValueError:
+            raise CommandError("--ids deve conter apenas números.")
+        cpfs = _lista(options['cpfs'])
+        filtro = {campo: options[campo] for campo in ('clube', 'posicao', 'idade_max') if options[campo] is not None}
+        if not ids and not cpfs and not filtro:
+            raise CommandError("Informe --ids, --cpfs ou algum filtro.")
+
+        resultado = transferir_jogadores(selecionar_jogadores(ids=ids, cpfs=cpfs, filtro=filtro), options['destino'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['transferidos']} jogadores transferidos de {resultado['clubes_origem'] or '-'}; "
+            f"{resultado['escalacoes_removidas']} escalações futuras removidas."
+        ))
@@ -0,0 +1,134 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('backend.metricas')
+
+
+class ContadorQueries:
+    """execute_wrapper que soma quantidade e tempo das queries de uma requisição."""
+
+    def __init__(self):
+        self.total = 0
+        self.tempo = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tempo += time.perf_counter() - inicio
+            self.total += 1
+
+
+# Contador da requisição atual. Uma ContextVar chega também às threads em que o
+# ASGI roda as views síncronas (sync_to_async copia o contexto), onde ficam as conexões usadas
+_contador_atual = ContextVar('contador_queries', default=None)
+
+
+def contar_query(execute, sql, params, many, context):
+    contador = _contador_atual.get()
+    if contador is None:
+        return execute(sql, params, many, context)
+    return contador(execute, sql, params, many, context)
+
+
+def instalar_contador(conexao):
+    """Deixa contar_query fixo na conexão (ver o receiver de connection_created em signals.py)."""
+    if contar_query not in conexao.execute_wrappers:
+        conexao.execute_wrappers.append(contar_query)
+
+
+class MetricasRequisicaoMiddleware:
+    """
+    Mede cada requisição: número de queries, tempo de banco, tempo do renderizador
+    JSON (só a conversão dos dados prontos em bytes; os serializers rodam dentro
+    da view e entram em view) e tempo total. Publica no header Server-Timing e numa
+    linha de log por requisição com o nome da rota, e avisa quando a rota passa do
+    orçamento de queries configurado em ORCAMENTO_QUERIES.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        # Conexões desta thread abertas antes do receiver existir (ex.: banco de testes)
+        for conexao in connections.all():
+            instalar_contador(conexao)
+        contador = ContadorQueries()
+        token = _contador_atual.set(contador)
+        request._metricas_json = 0.0
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _contador_atual.reset(token)
+        self.registrar(request, response, contador, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        contador = ContadorQueries()
+        token = _contador_atual.set(contador)
+        request._metricas_json = 0.0
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _contador_atual.reset(token)
+        self.registrar(request, response, contador, time.perf_counter() - inicio)
+        return response
+
+    def process_template_response(self, request, response):
+        # Respostas do DRF passam pelo JSONRenderer depois da view: mede esse trecho
+        inicio = time.perf_counter()
+
+        def fim(rendered):
+            request._metricas_json = time.perf_counter() - inicio
+
+        response.add_post_render_callback(fim)
+        return response
+
+    def registrar(self, request, response, contador, total):
+        match = getattr(request, 'resolver_match', None)
+        rota = (match.url_name or match.view_name) if match else None
+        renderizador = getattr(request, '_metricas_json', 0.0)
+        metricas = {
+            'rota': rota or '-',
+            'metodo': request.method,
+            'status': response.status_code,
+            'queries': contador.total,
+            'db_ms': round(contador.tempo * 1000, 1),
+            'json_ms': round(renderizador * 1000, 1),
+            'view_ms': round((total - renderizador) * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+        }
+
+        if getattr(settings, 'METRICAS_SERVER_TIMING', True):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metricas["db_ms"]};desc="{contador.total} queries"',
+                f'json;dur={metricas["json_ms"]};desc="JSONRenderer"',
+                f'view;dur={metricas["view_ms"]}',
+                f'total;dur={metricas["total_ms"]}',
+            ])
+
+        logger.info(' '.join(f'{chave}={valor}' for chave, valor in metricas.items()), extra={'metricas': metricas})
+
+        orcamentos = getattr(settings, 'ORCAMENTO_QUERIES', {})
+        orcamento = orcamentos.get(rota, orcamentos.get('*')) if rota else None
+        if orcamento is not None and contador.total > orcamento:
+            logger.warning(
+                'Orçamento de queries excedido em %s: %d queries (limite %d)',
+                rota, contador.total, orcamento, extra={'metricas': metricas},
+            )
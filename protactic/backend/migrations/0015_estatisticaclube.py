@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def popular_estatisticas(apps, schema_editor):
+    Partida = apps.get_model('backend', 'Partida')
+    EstatisticaClube = apps.get_model('backend', 'EstatisticaClube')
+
+    totais = {}
+    for competicao_id, mandante_id, visitante_id, pm, pv in Partida.objects.values_list(
+        'competicao_id', 'mandante_id', 'visitante_id', 'placar_mandante', 'placar_visitante'
+    ):
+        for clube_id, pro, contra in ((mandante_id, pm, pv), (visitante_id, pv, pm)):
+            linha = totais.setdefault((clube_id, competicao_id), dict.fromkeys(
+                ('jogos', 'vitorias', 'empates', 'derrotas', 'gols_pro', 'gols_contra', 'pontos'), 0
+            ))
+            linha['jogos'] += 1
+            linha['gols_pro'] += pro
+            linha['gols_contra'] += contra
+            if pro > contra:
+                linha['vitorias'] += 1
+                linha['pontos'] += 3
+            elif pro == contra:
+                linha['empates'] += 1
+                linha['pontos'] += 1
+            else:
+                linha['derrotas'] += 1
+
+    EstatisticaClube.objects.bulk_create([
+        EstatisticaClube(clube_id=clube_id, competicao_id=competicao_id, **valores)
+        for (clube_id, competicao_id), valores in totais.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_alter_clube_id_alter_competicao_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaClube',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jogos', models.IntegerField(default=0)),
+                ('vitorias', models.IntegerField(default=0)),
+                ('empates', models.IntegerField(default=0)),
+                ('derrotas', models.IntegerField(default=0)),
+                ('gols_pro', models.IntegerField(default=0)),
+                ('gols_contra', models.IntegerField(default=0)),
+                ('pontos', models.IntegerField(default=0)),
+                ('clube', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estatisticas', to='backend.clube')),
+                ('competicao', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='estatisticas', to='backend.competicao')),
+            ],
+            options={
+                'verbose_name': 'Estatística de Clube',
+                'unique_together': {('clube', 'competicao')},
+            },
+        ),
+        migrations.RunPython(popular_estatisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:47
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def tokenizar(texto):
+    # Cópia congelada de backend.busca.tokenizar: a migração não pode depender do código atual
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    normalizado = ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+    return [t[:100] for t in re.findall(r'\w+', normalizado)]
+
+
+def popular_indice(apps, schema_editor):
+    IndiceBusca = apps.get_model('backend', 'IndiceBusca')
+    linhas = []
+    for tipo, nome_modelo in (('JOGADOR', 'Jogador'), ('COMPETICAO', 'Competicao'), ('CLUBE', 'Clube')):
+        for objeto_id, nome in apps.get_model('backend', nome_modelo).objects.values_list('id', 'nome'):
+            linhas.extend(
+                IndiceBusca(tipo=tipo, objeto_id=objeto_id, token=token, posicao=posicao, nome=nome[:200])
+                for posicao, token in enumerate(tokenizar(nome))
+            )
+    IndiceBusca.objects.bulk_create(linhas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0015_estatisticaclube'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusca',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('JOGADOR', 'Jogador'), ('COMPETICAO', 'Competição'), ('CLUBE', 'Clube')], max_length=10)),
+                ('objeto_id', models.IntegerField()),
+                ('token', models.CharField(max_length=100)),
+                ('posicao', models.PositiveSmallIntegerField(default=0)),
+                ('nome', models.CharField(max_length=200)),
+            ],
+            options={
+                'verbose_name': 'Índice de Busca',
+                'indexes': [models.Index(fields=['tipo', 'token'], name='indicebusca_tipo_token'), models.Index(fields=['tipo', 'objeto_id'], name='indicebusca_tipo_objeto')],
+            },
+        ),
+        migrations.RunPython(popular_indice, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0016_indicebusca'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gol',
+            name='clube',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='gols_a_favor', to='backend.clube'),
+        ),
+    ]
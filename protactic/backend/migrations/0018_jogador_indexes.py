@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0017_gol_clube'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jogador',
+            index=models.Index(fields=['clube', 'nome'], name='jogador_clube_nome'),
+        ),
+        migrations.AddIndex(
+            model_name='jogador',
+            index=models.Index(fields=['clube', 'posicao', 'nome'], name='jogador_clube_posicao'),
+        ),
+        migrations.AddIndex(
+            model_name='jogador',
+            index=models.Index(fields=['clube', 'idade'], name='jogador_clube_idade'),
+        ),
+    ]
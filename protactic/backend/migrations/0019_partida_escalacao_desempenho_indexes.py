@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0018_jogador_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='desempenho',
+            index=models.Index(fields=['jogador', 'partida'], name='desempenho_jogador_partida'),
+        ),
+        migrations.AddIndex(
+            model_name='escalacao',
+            index=models.Index(fields=['partida', 'clube'], name='escalacao_partida_clube'),
+        ),
+        migrations.AddIndex(
+            model_name='escalacao',
+            index=models.Index(fields=['jogador', 'status'], name='escalacao_jogador_status'),
+        ),
+        migrations.AddIndex(
+            model_name='partida',
+            index=models.Index(fields=['mandante', 'data_hora'], name='partida_mandante_data'),
+        ),
+        migrations.AddIndex(
+            model_name='partida',
+            index=models.Index(fields=['visitante', 'data_hora'], name='partida_visitante_data'),
+        ),
+        migrations.AddIndex(
+            model_name='partida',
+            index=models.Index(fields=['competicao', 'data_hora'], name='partida_competicao_data'),
+        ),
+        migrations.AddIndex(
+            model_name='partida',
+            index=models.Index(fields=['data_hora', 'id'], name='partida_data_id'),
+        ),
+    ]
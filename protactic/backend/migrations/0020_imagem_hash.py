@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0019_partida_escalacao_desempenho_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clube',
+            name='escudo_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='jogador',
+            name='foto_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+    ]
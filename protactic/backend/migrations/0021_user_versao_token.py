@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0020_imagem_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='versao_token',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:21
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def marcar_gols_contra(apps, schema_editor):
+    # Gols antigos: o melhor dado disponível é o clube atual do autor
+    Gol = apps.get_model('backend', 'Gol')
+    Gol.objects.filter(clube__isnull=False).exclude(clube_id=F('autor__clube_id')).update(contra=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0021_user_versao_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gol',
+            name='contra',
+            field=models.BooleanField(default=False, help_text='Gol contra (não conta para o autor nos rankings)'),
+        ),
+        migrations.RunPython(marcar_gols_contra, migrations.RunPython.noop),
+    ]
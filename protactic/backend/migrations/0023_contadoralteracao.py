@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0022_gol_contra'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorAlteracao',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=100, unique=True)),
+                ('versao', models.PositiveBigIntegerField(default=0)),
+                ('alterado_em', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Contador de Alteração',
+            },
+        ),
+    ]
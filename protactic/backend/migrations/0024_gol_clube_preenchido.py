@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import F, OuterRef, Q, Subquery
+
+
+def preencher_clube_dos_gols(apps, schema_editor):
+    # Gols anteriores a 0017: o lado em que o autor foi escalado na partida ou,
+    # sem escalação, o clube atual dele quando for um dos dois da partida
+    Gol = apps.get_model('backend', 'Gol')
+    Escalacao = apps.get_model('backend', 'Escalacao')
+    Jogador = apps.get_model('backend', 'Jogador')
+
+    escalado = Escalacao.objects.filter(
+        partida_id=OuterRef('partida_id'), jogador_id=OuterRef('autor_id')
+    ).values('clube_id')[:1]
+    Gol.objects.filter(clube__isnull=True).update(clube_id=Subquery(escalado))
+
+    clube_atual = Jogador.objects.filter(pk=OuterRef('autor_id')).values('clube_id')[:1]
+    Gol.objects.filter(clube__isnull=True).filter(
+        Q(autor__clube_id=F('partida__mandante_id')) | Q(autor__clube_id=F('partida__visitante_id'))
+    ).update(clube_id=Subquery(clube_atual))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0023_contadoralteracao'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_clube_dos_gols, migrations.RunPython.noop),
+    ]
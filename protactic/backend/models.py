@@ -20,6 +20,9 @@ class User(AbstractUser):
         blank=True
     )
 
+    # Sobe quando papel, clube, senha ou status mudam; tokens com versão antiga são recusados
+    versao_token = models.PositiveIntegerField(default=0, editable=False)
+
     def save(self, *args, **kwargs):
         if self.user_type != 'TREINADOR':
             self.user_type = 'ADMIN'
@@ -30,6 +33,7 @@ class Clube(models.Model):
     pais = models.CharField(max_length=50)
     ano_fundacao = models.IntegerField()
     escudo = models.ImageField(upload_to='escudos/', blank=True, null=True)
+    escudo_hash = models.CharField(max_length=20, blank=True, default='', editable=False)  # Variantes em backend/imagens.py
 
     def __str__(self):
         return self.nome
@@ -84,9 +88,18 @@ class Jogador(models.Model):
     posicao = models.CharField(max_length=30, choices=POSICOES_CHOICES)
     perna = models.CharField(max_length=20, choices=PERNAS_CHOICES)
     foto = models.ImageField(upload_to='jogadores/', blank=True, null=True)
+    foto_hash = models.CharField(max_length=20, blank=True, default='', editable=False)  # Variantes em backend/imagens.py
     
     clube = models.ForeignKey(Clube, on_delete=models.CASCADE, related_name='jogadores')
 
+    class Meta:
+        # Filtros e ordenações da tela de elenco sempre partem do clube
+        indexes = [
+            models.Index(fields=['clube', 'nome'], name='jogador_clube_nome'),
+            models.Index(fields=['clube', 'posicao', 'nome'], name='jogador_clube_posicao'),
+            models.Index(fields=['clube', 'idade'], name='jogador_clube_idade'),
+        ]
+
     def __str__(self):
         return f"{self.nome} ({self.clube.nome})"
     
@@ -99,6 +112,15 @@ class Partida(models.Model):
     placar_mandante = models.IntegerField(default=0)
     placar_visitante = models.IntegerField(default=0)
 
+    class Meta:
+        # Histórico de um clube (mandante OR visitante por -data_hora), partidas de uma competição e a listagem paginada
+        indexes = [
+            models.Index(fields=['mandante', 'data_hora'], name='partida_mandante_data'),
+            models.Index(fields=['visitante', 'data_hora'], name='partida_visitante_data'),
+            models.Index(fields=['competicao', 'data_hora'], name='partida_competicao_data'),
+            models.Index(fields=['data_hora', 'id'], name='partida_data_id'),
+        ]
+
     def __str__(self):
         return f"{self.mandante} {self.placar_mandante}x{self.placar_visitante} {self.visitante} ({self.data_hora.strftime('%d/%m/%Y')})"
 
@@ -107,6 +129,10 @@ class Gol(models.Model):
     autor = models.ForeignKey(Jogador, on_delete=models.CASCADE, related_name='gols_marcados')
     assistencia = models.ForeignKey(Jogador, on_delete=models.SET_NULL, null=True, blank=True, related_name='assistencias_feitas')
     minuto = models.IntegerField(null=True, blank=True, help_text="Minuto do gol")
+    # Clube que recebeu o gol no placar (difere do clube do autor em gol contra)
+    clube = models.ForeignKey(Clube, on_delete=models.SET_NULL, null=True, blank=True, related_name='gols_a_favor')
+    # Gravado no registro do gol: o clube atual do autor deixa de servir depois de uma transferência
+    contra = models.BooleanField(default=False, help_text="Gol contra (não conta para o autor nos rankings)")
 
     def __str__(self):
         desc = f"Gol de {self.autor.nome}"
@@ -131,6 +157,10 @@ class Escalacao(models.Model):
     
     class Meta:
         unique_together = ('partida', 'jogador') # Um jogador só pode estar escalado uma vez por partida
+        indexes = [
+            models.Index(fields=['partida', 'clube'], name='escalacao_partida_clube'),
+            models.Index(fields=['jogador', 'status'], name='escalacao_jogador_status'),
+        ]
 
     def __str__(self):
         return f"{self.jogador.nome} - {self.status} ({self.partida})"
@@ -144,7 +174,67 @@ class Desempenho(models.Model):
 
     class Meta:
         unique_together = ('partida', 'jogador')
+        indexes = [
+            models.Index(fields=['jogador', 'partida'], name='desempenho_jogador_partida'),
+        ]
         verbose_name = "Desempenho"
 
     def __str__(self):
-        return f"{self.jogador.nome} - {self.nota}"
\ No newline at end of file
+        return f"{self.jogador.nome} - {self.nota}"
+
+class EstatisticaClube(models.Model):
+    # Tabela derivada de Partida, mantida incrementalmente (ver backend/estatisticas.py)
+    clube = models.ForeignKey(Clube, on_delete=models.CASCADE, related_name='estatisticas')
+    competicao = models.ForeignKey(Competicao, on_delete=models.CASCADE, null=True, blank=True, related_name='estatisticas')
+    jogos = models.IntegerField(default=0)
+    vitorias = models.IntegerField(default=0)
+    empates = models.IntegerField(default=0)
+    derrotas = models.IntegerField(default=0)
+    gols_pro = models.IntegerField(default=0)
+    gols_contra = models.IntegerField(default=0)
+    pontos = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('clube', 'competicao')
+        verbose_name = "Estatística de Clube"
+
+    def __str__(self):
+        return f"{self.clube} - {self.competicao or 'Sem competição'}"
+
+
+class IndiceBusca(models.Model):
+    # Uma linha por palavra (sem acento, minúscula) dos nomes pesquisáveis (ver backend/busca.py)
+    TIPO_CHOICES = (
+        ('JOGADOR', 'Jogador'),
+        ('COMPETICAO', 'Competição'),
+        ('CLUBE', 'Clube'),
+    )
+
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    objeto_id = models.IntegerField()
+    token = models.CharField(max_length=100)
+    posicao = models.PositiveSmallIntegerField(default=0)  # Posição da palavra no nome
+    nome = models.CharField(max_length=200)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tipo', 'token'], name='indicebusca_tipo_token'),
+            models.Index(fields=['tipo', 'objeto_id'], name='indicebusca_tipo_objeto'),
+        ]
+        verbose_name = "Índice de Busca"
+
+    def __str__(self):
+        return f"{self.tipo}:{self.token} ({self.nome})"
+
+
+class ContadorAlteracao(models.Model):
+    # Versão de cada modelo, lida pelos GETs condicionais (ver backend/condicional.py)
+    modelo = models.CharField(max_length=100, unique=True)  # app_label.model
+    versao = models.PositiveBigIntegerField(default=0)
+    alterado_em = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Contador de Alteração"
+
+    def __str__(self):
+        return f"{self.modelo} v{self.versao}"
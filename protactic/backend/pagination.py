@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PartidaCursorPagination(CursorPagination):
+    # Paginação por keyset em (data_hora, id): a página N custa o mesmo que a página 1
+    ordering = ('-data_hora', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class JogadorCursorPagination(CursorPagination):
+    # A ordenação vem do OrderingFilter; o id no fim garante um cursor estável
+    ordering = ('nome', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(campo.lstrip('-') in ('id', 'pk') for campo in ordering):
+            ordering += ('id',)
+        return ordering
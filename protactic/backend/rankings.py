@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.db.models import Count
+
+from .condicional import assinatura
+from .db import banco_analitico
+from .models import Gol, Jogador, Partida
+
+TIPOS_RANKING = ('gols', 'assistencias', 'participacoes')
+LIMITE_PADRAO = 10
+LIMITE_MAXIMO = 100
+
+ESCOPOS = ('geral', 'competicao', 'clube')
+
+# Modelos que mudam um ranking: os gols, o clube atual do jogador e a competição da partida
+MODELOS_RANKING = (Gol, Jogador, Partida)
+RANKING_TTL = 3600
+
+
+def _filtro_escopo(escopo, escopo_id, campo):
+    """Filtro sobre Gol para o escopo. O escopo de clube usa o clube atual do jogador."""
+    if escopo == 'competicao':
+        return {'partida__competicao_id': escopo_id}
+    if escopo == 'clube':
+        return {f'{campo}__clube_id': escopo_id}
+    return {}
+
+
+def _contagem(campo, escopo, escopo_id, ids=None, limite=None):
+    # Gol contra não conta para o autor nem para quem deu o passe
+    qs = Gol.objects.using(banco_analitico()).filter(
+        contra=False, **{f'{campo}__isnull': False}, **_filtro_escopo(escopo, escopo_id, campo)
+    )
+    if ids is not None:
+        qs = qs.filter(**{f'{campo}_id__in': ids})
+    qs = qs.values_list(campo).annotate(total=Count('id')).order_by('-total', campo)
+    if limite is not None:
+        qs = qs[:limite]
+    return dict(qs)
+
+
+def calcular_ranking(tipo, escopo='geral', escopo_id=None, limite=LIMITE_PADRAO):
+    """Top-K de (jogador_id, gols, assistencias) por agregação agrupada sobre Gol."""
+    if tipo == 'participacoes':
+        # Soma precisa dos dois agrupamentos completos antes de cortar o top-K
+        gols = _contagem('autor', escopo, escopo_id)
+        assistencias = _contagem('assistencia', escopo, escopo_id)
+        ids = sorted(
+            set(gols) | set(assistencias),
+            key=lambda i: (-(gols.get(i, 0) + assistencias.get(i, 0)), -gols.get(i, 0), i),
+        )[:limite]
+    elif tipo == 'gols':
+        gols = _contagem('autor', escopo, escopo_id, limite=limite)
+        ids = list(gols)
+        assistencias = _contagem('assistencia', escopo, escopo_id, ids=ids)
+    else:
+        assistencias = _contagem('assistencia', escopo, escopo_id, limite=limite)
+        ids = list(assistencias)
+        gols = _contagem('autor', escopo, escopo_id, ids=ids)
+    return [(i, gols.get(i, 0), assistencias.get(i, 0)) for i in ids]
+
+
+def obter_ranking(tipo, escopo='geral', escopo_id=None, limite=LIMITE_PADRAO):
+    """
+    Ranking em cache, com os dados atuais dos jogadores buscados em uma única query.
+
+    A chave leva os contadores de alteração do banco (ver condicional.py), que
+    qualquer processo troca depois do commit: uma gravação feita em outro worker
+    já muda a chave aqui, e a resposta acompanha o ETag calculado dos mesmos contadores.
+    """
+    chave = f"ranking:{escopo}:{escopo_id or ''}:{assinatura(*MODELOS_RANKING)}:{tipo}:{limite}"
+    linhas = cache.get(chave)
+    if linhas is None:
+        linhas = calcular_ranking(tipo, escopo, escopo_id, limite)
+        cache.set(chave, linhas, RANKING_TTL)
+
+    jogadores = Jogador.objects.select_related('clube').only(
+        'id', 'nome', 'posicao', 'foto', 'clube__id', 'clube__nome'
+    ).in_bulk([jogador_id for jogador_id, _, _ in linhas])
+    ranking = []
+    for jogador_id, gols, assistencias in linhas:
+        jogador = jogadores.get(jogador_id)
+        if jogador is None:
+            continue
+        ranking.append({
+            "jogador": jogador,
+            "gols": gols,
+            "assistencias": assistencias,
+            "participacoes": gols + assistencias,
+        })
+    return ranking
@@ -11,11 +11,19 @@ class NavResponseSerializer(serializers.Serializer):
     items = NavItemSerializer(many=True)
 
 from .models import Clube
+from .imagens import urls_variantes
+from .campos import CamposDinamicosMixin
+
+class ClubeSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    escudo_variantes = serializers.SerializerMethodField()
 
-class ClubeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Clube
-        fields = '__all__'
+        exclude = ['escudo_hash']
+        colunas_calculadas = {'escudo_variantes': ('escudo', 'escudo_hash')}
+
+    def get_escudo_variantes(self, obj):
+        return urls_variantes(obj.escudo, obj.escudo_hash, self.context.get('request'))
 
 class ArtilheiroSerializer(serializers.Serializer):
     nome = serializers.CharField()
@@ -29,50 +37,152 @@ class ClubeDashboardSerializer(serializers.Serializer):
 
 from .models import Jogador
 
-class JogadorSerializer(serializers.ModelSerializer):
+class JogadorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    foto_variantes = serializers.SerializerMethodField()
+
     class Meta:
         model = Jogador
-        fields = '__all__'
+        exclude = ['foto_hash']
+        colunas_calculadas = {'foto_variantes': ('foto', 'foto_hash')}
+        expansiveis = {'clube': (ClubeSerializer, {})}
+
+    def get_foto_variantes(self, obj):
+        return urls_variantes(obj.foto, obj.foto_hash, self.context.get('request'))
     
 from .models import Competicao
 
-class CompeticaoSerializer(serializers.ModelSerializer):
+class CompeticaoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Competicao
         fields = '__all__'
 
 from .models import Partida, Gol
 
-class GolSerializer(serializers.ModelSerializer):
+class GolSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     nome_autor = serializers.ReadOnlyField(source='autor.nome')
     nome_assistencia = serializers.ReadOnlyField(source='assistencia.nome')
 
     class Meta:
         model = Gol
         fields = '__all__'
+        # Calculado no registro do gol (ver backend/eventos.py)
+        read_only_fields = ['contra']
+        expansiveis = {'autor': (JogadorSerializer, {}), 'assistencia': (JogadorSerializer, {})}
 
-class PartidaSerializer(serializers.ModelSerializer):
-    gols = GolSerializer(many=True, read_only=True)
+class PartidaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     nome_mandante = serializers.ReadOnlyField(source='mandante.nome')
     nome_visitante = serializers.ReadOnlyField(source='visitante.nome')
+    # Vêm por padrão; um ?fields= sem gols dispensa também o prefetch
+    gols = GolSerializer(many=True, read_only=True)
 
     class Meta:
         model = Partida
         fields = '__all__'
+        expansiveis = {
+            'mandante': (ClubeSerializer, {}),
+            'visitante': (ClubeSerializer, {}),
+            'competicao': (CompeticaoSerializer, {}),
+        }
 
 from .models import Escalacao
 
-class EscalacaoSerializer(serializers.ModelSerializer):
+class EscalacaoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Escalacao
         fields = '__all__'
+        expansiveis = {'jogador': (JogadorSerializer, {}), 'clube': (ClubeSerializer, {})}
 
 from .models import Desempenho
 
-class DesempenhoSerializer(serializers.ModelSerializer):
+class DesempenhoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     nome_jogador = serializers.ReadOnlyField(source='jogador.nome')
     posicao_jogador = serializers.ReadOnlyField(source='jogador.posicao')
 
     class Meta:
         model = Desempenho
-        fields = ['id', 'partida', 'jogador', 'nome_jogador', 'posicao_jogador', 'nota', 'gols', 'assistencias']
\ No newline at end of file
+        fields = ['id', 'partida', 'jogador', 'nome_jogador', 'posicao_jogador', 'nota', 'gols', 'assistencias']
+        expansiveis = {'jogador': (JogadorSerializer, {})}
+class EscalacaoItemSerializer(serializers.Serializer):
+    jogador = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Escalacao.STATUS_CHOICES)
+    x = serializers.FloatField(required=False, allow_null=True)
+    y = serializers.FloatField(required=False, allow_null=True)
+
+class EscalacaoLoteSerializer(serializers.Serializer):
+    clube = serializers.IntegerField()
+    jogadores = EscalacaoItemSerializer(many=True)
+
+    def validate_jogadores(self, itens):
+        # Unicidade (partida, jogador) checada em memória antes de tocar no banco
+        vistos = set()
+        repetidos = set()
+        for item in itens:
+            if item['jogador'] in vistos:
+                repetidos.add(item['jogador'])
+            vistos.add(item['jogador'])
+        if repetidos:
+            raise serializers.ValidationError(f"Jogadores repetidos na escalação: {sorted(repetidos)}")
+        return itens
+
+class EventoPartidaSerializer(serializers.Serializer):
+    TIPO_CHOICES = (
+        ('gol', 'Gol'),
+        ('remover_gol', 'Remover gol'),
+    )
+
+    tipo = serializers.ChoiceField(choices=TIPO_CHOICES)
+    autor = serializers.IntegerField(required=False)
+    assistencia = serializers.IntegerField(required=False, allow_null=True)
+    minuto = serializers.IntegerField(required=False, allow_null=True, min_value=0)
+    clube = serializers.IntegerField(required=False, allow_null=True) # Gol contra: clube que recebe o gol
+    gol = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if attrs['tipo'] == 'gol' and not attrs.get('autor'):
+            raise serializers.ValidationError({"autor": "Obrigatório para eventos de gol."})
+        if attrs['tipo'] == 'remover_gol' and not attrs.get('gol'):
+            raise serializers.ValidationError({"gol": "Obrigatório para remover um gol."})
+        return attrs
+
+class EventosPartidaSerializer(serializers.Serializer):
+    eventos = EventoPartidaSerializer(many=True, allow_empty=False)
+
+class DesempenhoItemSerializer(serializers.Serializer):
+    jogador = serializers.IntegerField()
+    nota = serializers.DecimalField(max_digits=3, decimal_places=1, min_value=0, max_value=10, required=False, allow_null=True)
+    # Sem default: campo ausente não é sobrescrito no upsert (ver PartidaDesempenhosView)
+    gols = serializers.IntegerField(min_value=0, required=False)
+    assistencias = serializers.IntegerField(min_value=0, required=False)
+
+class FiltroJogadoresSerializer(serializers.Serializer):
+    clube = serializers.IntegerField(required=False)
+    posicao = serializers.ChoiceField(choices=Jogador.POSICOES_CHOICES, required=False)
+    perna = serializers.ChoiceField(choices=Jogador.PERNAS_CHOICES, required=False)
+    nacionalidade = serializers.CharField(required=False)
+    idade_min = serializers.IntegerField(required=False, min_value=0)
+    idade_max = serializers.IntegerField(required=False, min_value=0)
+
+class TransferenciaSerializer(serializers.Serializer):
+    clube_destino = serializers.IntegerField()
+    jogadores = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    cpfs = serializers.ListField(child=serializers.CharField(max_length=14), required=False, default=list)
+    filtro = FiltroJogadoresSerializer(required=False)
+
+    def validate(self, attrs):
+        # Sem nenhum critério a transferência pegaria todos os jogadores
+        if not attrs['jogadores'] and not attrs['cpfs'] and not attrs.get('filtro'):
+            raise serializers.ValidationError("Informe 'jogadores', 'cpfs' ou 'filtro'.")
+        return attrs
+
+class ResetEscalacoesSerializer(serializers.Serializer):
+    partida = serializers.IntegerField(required=False)
+    clube = serializers.IntegerField(required=False)
+    inicio = serializers.DateField(required=False)
+    fim = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Informe 'partida', 'clube' ou um intervalo de datas.")
+        if attrs.get('inicio') and attrs.get('fim') and attrs['inicio'] > attrs['fim']:
+            raise serializers.ValidationError({"fim": "Deve ser igual ou posterior a 'inicio'."})
+        return attrs
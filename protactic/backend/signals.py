@@ -0,0 +1,179 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+
+from . import autenticacao, busca, estatisticas, imagens, tempo_real
+from .condicional import marcar_alteracao
+from .middleware import instalar_contador
+from .models import Clube, Competicao, Desempenho, Escalacao, EstatisticaClube, Gol, Jogador, Partida, User
+
+
+@receiver(pre_save, sender=Partida)
+def guardar_estado_partida(sender, instance, raw=False, **kwargs):
+    instance._estado_anterior = None
+    if instance.pk and not raw:
+        anterior = Partida.objects.filter(pk=instance.pk).values_list(*estatisticas.CAMPOS_PARTIDA).first()
+        instance._estado_anterior = anterior
+
+
+@receiver(post_save, sender=Partida)
+def atualizar_estatisticas_partida(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_estado_anterior', None)
+    atual = estatisticas.estado_partida(instance)
+    if anterior == atual:
+        return
+    if anterior is not None:
+        estatisticas.aplicar(anterior, -1)
+    estatisticas.aplicar(atual, 1)
+
+
+@receiver(post_delete, sender=Partida)
+def remover_estatisticas_partida(sender, instance, **kwargs):
+    estatisticas.aplicar(estatisticas.estado_partida(instance), -1)
+
+
+@receiver(pre_delete, sender=Competicao)
+def mover_estatisticas_competicao(sender, instance, **kwargs):
+    estatisticas.mover_para_sem_competicao(instance.pk)
+
+
+@receiver(post_save, sender=Jogador)
+@receiver(post_save, sender=Competicao)
+@receiver(post_save, sender=Clube)
+def indexar_busca(sender, instance, raw=False, **kwargs):
+    if not raw:
+        busca.indexar(instance)
+
+
+@receiver(post_delete, sender=Jogador)
+@receiver(post_delete, sender=Competicao)
+@receiver(post_delete, sender=Clube)
+def remover_busca(sender, instance, **kwargs):
+    busca.remover_do_indice(instance)
+
+
+@receiver(post_save, sender=Partida)
+def publicar_placar(sender, instance, created, raw=False, **kwargs):
+    anterior = getattr(instance, '_estado_anterior', None)
+    if raw or created or anterior is None:
+        return
+    if anterior[3:] != (instance.placar_mandante, instance.placar_visitante):
+        tempo_real.publicar(
+            instance.pk, 'placar',
+            placar_mandante=instance.placar_mandante, placar_visitante=instance.placar_visitante,
+        )
+
+
+@receiver(post_save, sender=Gol)
+def publicar_gol(sender, instance, raw=False, **kwargs):
+    if not raw:
+        tempo_real.publicar(instance.partida_id, 'gol', gol=tempo_real.dados_gol(instance))
+
+
+@receiver(post_delete, sender=Gol)
+def publicar_gol_removido(sender, instance, **kwargs):
+    tempo_real.publicar(instance.partida_id, 'gol_removido', gol={'id': instance.pk})
+
+
+@receiver(post_save, sender=Escalacao)
+def publicar_escalacao(sender, instance, raw=False, **kwargs):
+    if not raw:
+        tempo_real.publicar(instance.partida_id, 'jogador_escalado', escalacao=tempo_real.dados_escalacao(instance))
+
+
+@receiver(post_delete, sender=Escalacao)
+def publicar_escalacao_removida(sender, instance, **kwargs):
+    tempo_real.publicar(instance.partida_id, 'jogador_removido', escalacao={'id': instance.pk, 'jogador': instance.jogador_id})
+
+
+@receiver(pre_save, sender=Clube)
+@receiver(pre_save, sender=Jogador)
+def gerar_variantes_imagem(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    campo, campo_hash = imagens.IMAGENS[sender]
+    arquivo = getattr(instance, campo)
+    if not arquivo:
+        setattr(instance, campo_hash, '')
+    elif not arquivo._committed:
+        # Upload novo: ainda não foi gravado, então as variantes saem do conteúdo em memória
+        setattr(instance, campo_hash, imagens.gerar_variantes(arquivo))
+    elif arquivo.name != _nome_gravado(sender, instance, campo):
+        # Arquivo que já estava no storage atribuído pelo nome: o hash guardado é do anterior
+        setattr(instance, campo_hash, imagens.gerar_variantes(arquivo))
+
+
+def _nome_gravado(modelo, instance, campo):
+    if instance._state.adding:
+        return None
+    return modelo.objects.filter(pk=instance.pk).values_list(campo, flat=True).first()
+
+
+@receiver(pre_save, sender=User)
+def versionar_tokens(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._revogar_tokens = False
+    if raw or not instance.pk:
+        return
+    if update_fields is not None and not set(update_fields) & set(autenticacao.CAMPOS_REVOGACAO):
+        return
+    anterior = User.objects.filter(pk=instance.pk).values(*autenticacao.CAMPOS_REVOGACAO, 'versao_token').first()
+    if anterior:
+        # Um save completo de uma instância antiga não pode devolver uma versão já revogada
+        instance.versao_token = anterior['versao_token']
+        instance._revogar_tokens = any(
+            anterior[campo] != getattr(instance, campo) for campo in autenticacao.CAMPOS_REVOGACAO
+        )
+
+
+@receiver(post_save, sender=User)
+def publicar_versao_tokens(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, '_revogar_tokens', False):
+        return
+    # Incremento no banco: vale também com save(update_fields=[...]), que não gravaria o campo
+    User.objects.filter(pk=instance.pk).update(versao_token=F('versao_token') + 1)
+    instance.refresh_from_db(fields=['versao_token'])
+    instance._revogar_tokens = False
+    transaction.on_commit(lambda: autenticacao.publicar_versao(instance.pk, instance.versao_token))
+
+
+@receiver(post_delete, sender=User)
+def revogar_tokens(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autenticacao.esquecer_versao(instance.pk))
+
+
+# Modelos alterados sem sinal próprio: a tabela materializada da Partida e os SET_NULL do delete
+ALTERADOS_JUNTO = {
+    Partida: (EstatisticaClube,),
+    Competicao: (Partida, EstatisticaClube),
+    Clube: (Gol,),
+    Jogador: (Gol,),
+}
+
+
+@receiver(post_save, sender=Clube)
+@receiver(post_save, sender=Competicao)
+@receiver(post_save, sender=Jogador)
+@receiver(post_save, sender=Partida)
+@receiver(post_save, sender=Gol)
+@receiver(post_save, sender=Escalacao)
+@receiver(post_save, sender=Desempenho)
+@receiver(post_delete, sender=Clube)
+@receiver(post_delete, sender=Competicao)
+@receiver(post_delete, sender=Jogador)
+@receiver(post_delete, sender=Partida)
+@receiver(post_delete, sender=Gol)
+@receiver(post_delete, sender=Escalacao)
+@receiver(post_delete, sender=Desempenho)
+def registrar_alteracao(sender, instance, raw=False, **kwargs):
+    if not raw:
+        marcar_alteracao(sender, *ALTERADOS_JUNTO.get(sender, ()))
+
+
+@receiver(connection_created)
+def instalar_contador_queries(sender, connection, **kwargs):
+    # Toda conexão nova, em qualquer thread, passa a contar as queries da requisição atual
+    instalar_contador(connection)
@@ -0,0 +1,126 @@
+"""
+Canal de eventos ao vivo por partida (tela "Tempo Real").
+
+Os sinais dos modelos publicam deltas pequenos (gol, placar, escalação) num
+broker em processo; a view SSE de cada espectador só lê da própria fila, sem
+consultar o banco a cada poucos segundos. O broker padrão vive em memória e
+pode ser trocado por outro (ex.: um que repasse via Redis) com a configuração
+TEMPO_REAL_BROKER, desde que implemente assinar/cancelar/publicar.
+"""
+import asyncio
+import itertools
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Escalacao, Gol, Partida
+
+
+class BrokerMemoria:
+    def __init__(self, tamanho_fila=100):
+        self.tamanho_fila = tamanho_fila
+        self._assinantes = defaultdict(set)
+        self._sequencias = defaultdict(lambda: itertools.count(1))
+        self._lock = threading.Lock()
+
+    def assinar(self, partida_id):
+        """Cria a fila de um espectador. Deve ser chamado dentro do event loop que vai lê-la."""
+        fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        with self._lock:
+            self._assinantes[partida_id].add((asyncio.get_running_loop(), fila))
+        return fila
+
+    def cancelar(self, partida_id, fila):
+        with self._lock:
+            assinantes = self._assinantes.get(partida_id, set())
+            assinantes.difference_update({a for a in assinantes if a[1] is fila})
+            if not assinantes:
+                # Sem espectadores a partida não guarda estado: nem fila, nem contador de sequência
+                self._assinantes.pop(partida_id, None)
+                self._sequencias.pop(partida_id, None)
+
+    def assinantes(self, partida_id):
+        with self._lock:
+            return len(self._assinantes.get(partida_id, ()))
+
+    def publicar(self, partida_id, evento):
+        """Serializa o evento uma vez e entrega a todas as filas da partida, de qualquer thread."""
+        with self._lock:
+            assinantes = list(self._assinantes.get(partida_id, ()))
+            if not assinantes:
+                return
+            sequencia = next(self._sequencias[partida_id])
+        mensagem = (sequencia, evento['tipo'], json.dumps(evento, cls=DjangoJSONEncoder))
+        for loop, fila in assinantes:
+            try:
+                loop.call_soon_threadsafe(self._entregar, fila, mensagem)
+            except RuntimeError:
+                # Loop já encerrado: o espectador desconectou e a fila some no cancelar()
+                pass
+
+    @staticmethod
+    def _entregar(fila, mensagem):
+        try:
+            fila.put_nowait(mensagem)
+        except asyncio.QueueFull:
+            # Cliente lento perde o delta; ao reconectar recebe o estado completo
+            pass
+
+
+broker = import_string(getattr(settings, 'TEMPO_REAL_BROKER', 'backend.tempo_real.BrokerMemoria'))()
+
+
+def publicar(partida_id, tipo, **dados):
+    """Publica depois do commit, para ninguém ver um evento que sofreu rollback."""
+    evento = {'tipo': tipo, 'partida': partida_id, **dados}
+    transaction.on_commit(lambda: broker.publicar(partida_id, evento))
+
+
+def formatar_sse(sequencia, tipo, dados):
+    return f"id: {sequencia}\nevent: {tipo}\ndata: {dados}\n\n"
+
+
+def dados_gol(gol):
+    return {
+        'id': gol.id,
+        'autor': gol.autor_id,
+        'nome_autor': gol.autor.nome,
+        'assistencia': gol.assistencia_id,
+        'nome_assistencia': gol.assistencia.nome if gol.assistencia_id else None,
+        'minuto': gol.minuto,
+        'contra': gol.contra,
+    }
+
+
+def dados_escalacao(escalacao):
+    return {
+        'id': escalacao.id,
+        'clube': escalacao.clube_id,
+        'jogador': escalacao.jogador_id,
+        'status': escalacao.status,
+        'x': escalacao.x,
+        'y': escalacao.y,
+    }
+
+
+def estado_partida(partida_id):
+    """Estado completo enviado quando um espectador conecta (uma leitura por conexão)."""
+    partida = Partida.objects.select_related('mandante', 'visitante').filter(pk=partida_id).first()
+    if partida is None:
+        return None
+    gols = Gol.objects.filter(partida_id=partida_id).select_related('autor', 'assistencia').order_by('minuto', 'id')
+    return {
+        'tipo': 'estado',
+        'partida': partida.id,
+        'mandante': {'id': partida.mandante_id, 'nome': partida.mandante.nome},
+        'visitante': {'id': partida.visitante_id, 'nome': partida.visitante.nome},
+        'placar_mandante': partida.placar_mandante,
+        'placar_visitante': partida.placar_visitante,
+        'gols': [dados_gol(gol) for gol in gols],
+        'escalacao': [dados_escalacao(e) for e in Escalacao.objects.filter(partida_id=partida_id).order_by('id')],
+    }
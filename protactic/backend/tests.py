@@ -1,3 +1,1206 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from importlib import import_module
+from datetime import date, datetime, timedelta, timezone as tz
+from io import BytesIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .busca import autocomplete, resultados_compactos
+from .classificacao import calcular_classificacao, obter_classificacao
+from . import tempo_real
+from .condicional import marcar_alteracao
+from .escalacoes import escalacoes_no_escopo, resetar_escalacoes
+from .estatisticas import CAMPOS_ESTATISTICA, divergencias_estatisticas, recalcular_estatisticas
+from .imagens import gerar_variantes_de_bytes
+from .models import (
+    Clube, Competicao, ContadorAlteracao, Desempenho, Escalacao, EstatisticaClube, Gol, IndiceBusca, Jogador, Partida, User,
+)
+from .rankings import obter_ranking
+
+# Tabelas cujas consultas não podem cair em varredura completa
+TABELAS_GUARDADAS = ('backend_partida', 'backend_gol', 'backend_escalacao', 'backend_desempenho')
+
+
+def criar_dados(partidas=10):
+    """Duas equipes com elenco, uma competição e `partidas` jogos com gols, escalações e notas."""
+    clubes = [Clube.objects.create(nome=nome, pais='Brasil', ano_fundacao=1900) for nome in ('Alfa', 'Beta', 'Gama')]
+    competicao = Competicao.objects.create(
+        nome='Liga', tamanho='Pequeno', tipo_participantes='Clubes', divisao='1', tipo_formato='Liga'
+    )
+    elencos = {
+        clube.id: [
+            Jogador.objects.create(
+                nome=f'{clube.nome} {i}', cpf=f'{clube.id}{i:03d}', idade=18 + i, peso=70, altura=1.8,
+                nacionalidade='Brasil', posicao='Zagueiro', perna='Destro', clube=clube,
+            )
+            for i in range(3)
+        ]
+        for clube in clubes
+    }
+    inicio = datetime(2025, 1, 1, tzinfo=tz.utc)
+    for i in range(partidas):
+        mandante, visitante = clubes[i % 3], clubes[(i + 1) % 3]
+        partida = Partida.objects.create(
+            competicao=competicao, mandante=mandante, visitante=visitante,
+            data_hora=inicio + timedelta(days=i), placar_mandante=i % 3, placar_visitante=i % 2,
+        )
+        autor, garcom = elencos[mandante.id][:2]
+        Gol.objects.create(partida=partida, autor=autor, assistencia=garcom, minuto=10, clube=mandante)
+        for jogador in elencos[mandante.id]:
+            Escalacao.objects.create(partida=partida, clube=mandante, jogador=jogador, status='TITULAR', x=50, y=50)
+            Desempenho.objects.create(partida=partida, jogador=jogador, nota=7)
+    return clubes, competicao, elencos
+
+
+def ampliar_dados(clubes, competicao, elencos, partidas):
+    """Acrescenta `partidas` jogos no mesmo formato de criar_dados, com bulk_create para ser rápido."""
+    inicio = Partida.objects.order_by('-data_hora').values_list('data_hora', flat=True).first()
+    novas = Partida.objects.bulk_create([
+        Partida(
+            competicao=competicao, mandante=clubes[i % 3], visitante=clubes[(i + 1) % 3],
+            data_hora=inicio + timedelta(hours=i + 1), placar_mandante=i % 3, placar_visitante=i % 2,
+        )
+        for i in range(partidas)
+    ])
+    gols, escalacoes, desempenhos = [], [], []
+    for partida in novas:
+        elenco = elencos[partida.mandante_id]
+        gols.append(Gol(partida=partida, autor=elenco[0], assistencia=elenco[1], minuto=10, clube_id=partida.mandante_id))
+        for jogador in elenco:
+            escalacoes.append(Escalacao(partida=partida, clube_id=partida.mandante_id, jogador=jogador, status='TITULAR', x=50, y=50))
+            desempenhos.append(Desempenho(partida=partida, jogador=jogador, nota=7))
+    Gol.objects.bulk_create(gols)
+    Escalacao.objects.bulk_create(escalacoes)
+    Desempenho.objects.bulk_create(desempenhos)
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN é específico do SQLite")
+class PlanoDeConsultaTests(TestCase):
+    """Cada consulta das views quentes precisa usar índice nas tabelas de partida, gol, escalação e desempenho."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados()
+        cls.partida = Partida.objects.order_by('id').first()
+        cls.user = User.objects.create_user('admin', password='senha')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def varreduras(self, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertLess(response.status_code, 400, url)
+
+        encontradas = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                detalhes = [linha[-1] for linha in cursor.fetchall()]
+                # Percorrer um índice só é aceitável quando ele entrega a ordenação (e o LIMIT corta a leitura)
+                ordena_em_memoria = any('USE TEMP B-TREE FOR ORDER BY' in d for d in detalhes)
+                for detalhe in detalhes:
+                    for tabela in TABELAS_GUARDADAS:
+                        if re.match(rf'SCAN {tabela}\b', detalhe) and ('USING' not in detalhe or ordena_em_memoria):
+                            encontradas.append(f'{detalhe} <- {sql}')
+        return encontradas
+
+    def assertSemVarredura(self, url, params=None):
+        varreduras = self.varreduras(url, params)
+        self.assertEqual(varreduras, [], f"Varredura completa em {url}")
+
+    def test_dashboard_clube(self):
+        self.assertSemVarredura(f'/clubes/{self.clubes[0].id}/dashboard/')
+
+    def test_times_da_competicao(self):
+        self.assertSemVarredura(f'/competicoes/{self.competicao.id}/times/')
+
+    def test_estatisticas_clube_na_competicao(self):
+        self.assertSemVarredura(f'/competicoes/{self.competicao.id}/clubes/{self.clubes[0].id}/estatisticas/')
+
+    def test_classificacao(self):
+        self.assertSemVarredura(f'/competicoes/{self.competicao.id}/classificacao/')
+
+    def test_listagem_de_partidas(self):
+        self.assertSemVarredura('/partidas/')
+
+    def test_escalacao_da_partida(self):
+        self.assertSemVarredura(f'/partidas/{self.partida.id}/escalacao/', {'clube': self.clubes[0].id})
+        self.assertSemVarredura('/escalacoes/', {'partida': self.partida.id})
+
+    def test_desempenhos_filtrados(self):
+        jogador = self.elencos[self.clubes[0].id][0]
+        self.assertSemVarredura('/desempenhos/', {'partida': self.partida.id})
+        self.assertSemVarredura('/desempenhos/', {'jogador': jogador.id})
+
+    def test_estatisticas_do_elenco(self):
+        self.assertSemVarredura('/jogadores/estatisticas/', {'clube': self.clubes[0].id})
+
+    def test_rankings_por_escopo(self):
+        self.assertSemVarredura(f'/competicoes/{self.competicao.id}/ranking/', {'tipo': 'participacoes'})
+        self.assertSemVarredura(f'/clubes/{self.clubes[0].id}/ranking/', {'tipo': 'participacoes'})
+
+
+class ContagemDeQueriesTests(TestCase):
+    """
+    Número de queries de cada rota de leitura: não pode passar do orçamento nem
+    crescer quando a base vai de 10 para 500 partidas (sinal de N+1).
+    """
+    PARTIDAS_EXTRAS = 490
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados()
+        cls.partida = Partida.objects.order_by('id').first()
+        cls.user = User.objects.create_user('admin', password='senha')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def rotas(self):
+        """
+        (rota, url, parâmetros, máximo de queries) de cada view e viewset registrado.
+        Os GETs condicionais contam a leitura dos contadores de alteração.
+        """
+        clube, competicao, partida = self.clubes[0], self.competicao, self.partida
+        jogador = self.elencos[clube.id][0]
+        return [
+            ('navigation', '/navigation/', {}, 0),
+            ('clube-list', '/clubes/', {}, 2),
+            ('clube-detail', f'/clubes/{clube.id}/', {}, 2),
+            ('clube_dashboard', f'/clubes/{clube.id}/dashboard/', {}, 7),
+            ('jogador-list', '/jogadores/', {}, 2),
+            ('jogador-list:filtros', '/jogadores/', {'clube': clube.id, 'ordering': '-idade'}, 2),
+            ('jogador-list:search', '/jogadores/', {'search': 'alfa'}, 2),
+            ('jogador-detail', f'/jogadores/{jogador.id}/', {}, 2),
+            ('jogador_estatisticas', '/jogadores/estatisticas/', {'clube': clube.id}, 6),
+            ('competicao-list', '/competicoes/', {}, 2),
+            ('competicao-detail', f'/competicoes/{competicao.id}/', {}, 2),
+            ('competicao_times', f'/competicoes/{competicao.id}/times/', {}, 4),
+            ('competicao_classificacao', f'/competicoes/{competicao.id}/classificacao/', {}, 4),
+            ('competicao_clube_stats', f'/competicoes/{competicao.id}/clubes/{clube.id}/estatisticas/', {}, 5),
+            ('ranking', '/ranking/', {}, 4),
+            ('ranking_competicao', f'/competicoes/{competicao.id}/ranking/', {'tipo': 'assistencias'}, 5),
+            ('ranking_clube', f'/clubes/{clube.id}/ranking/', {'tipo': 'participacoes'}, 5),
+            ('partida-list', '/partidas/', {}, 3),
+            ('partida-detail', f'/partidas/{partida.id}/', {}, 3),
+            ('partida_escalacao', f'/partidas/{partida.id}/escalacao/', {'clube': clube.id}, 3),
+            ('gol-list', '/gols/', {}, 2),
+            ('escalacao-list', '/escalacoes/', {'partida': partida.id}, 2),
+            ('desempenho-list', '/desempenhos/', {'partida': partida.id}, 2),
+            ('desempenho-list:jogador', '/desempenhos/', {'jogador': jogador.id}, 2),
+            ('busca_global', '/busca/', {'q': 'alf'}, 5),
+        ]
+
+    def contar(self):
+        contagens = {}
+        for rota, url, params, _ in self.rotas():
+            # Caches frios: mede o caminho completo, não o atalho da cache
+            cache.clear()
+            autocomplete.limpar()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200, rota)
+            contagens[rota] = len(ctx.captured_queries)
+        return contagens
+
+    def test_queries_nao_crescem_com_os_dados(self):
+        pequena = self.contar()
+        ampliar_dados(self.clubes, self.competicao, self.elencos, self.PARTIDAS_EXTRAS)
+        grande = self.contar()
+
+        for rota, url, _, maximo in self.rotas():
+            with self.subTest(rota=rota):
+                self.assertEqual(grande[rota], pequena[rota], f"{url}: queries crescem com o volume de dados")
+                self.assertLessEqual(grande[rota], maximo, f"{url}: acima do orçamento de queries")
+
+
+class MetricasRequisicaoTests(TestCase):
+    """O Server-Timing conta as queries da requisição no WSGI e no ASGI."""
+
+    @classmethod
+    def setUpTestData(cls):
+        criar_dados(partidas=1)
+        User.objects.create_user('admin', password='senha')
+
+    def setUp(self):
+        cache.clear()
+        self.token = self.client.post('/', {'username': 'admin', 'password': 'senha'}).json()['access']
+
+    def queries(self, response):
+        return int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', response['Server-Timing']).group(1))
+
+    def test_requisicao_sincrona(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/clubes/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.queries(response), len(ctx.captured_queries))
+        self.assertRegex(response['Server-Timing'], r'json;dur=[\d.]+;desc="JSONRenderer"')
+
+    async def test_requisicao_assincrona(self):
+        response = await self.async_client.get('/clubes/', headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('total;dur=', response['Server-Timing'])
+        self.assertGreaterEqual(self.queries(response), 1)
+
+
+class AutenticacaoTokenTests(TestCase):
+    """O usuário vem das claims do token; mudanças de papel revogam os tokens já emitidos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clube = Clube.objects.create(nome='Alfa', pais='Brasil', ano_fundacao=1900)
+        cls.user = User.objects.create_user('tecnico', password='senha', user_type='TREINADOR', clube=cls.clube)
+
+    def setUp(self):
+        cache.clear()
+        response = self.client.post('/', {'username': 'tecnico', 'password': 'senha'})
+        self.client = APIClient(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+
+    def test_requisicao_nao_consulta_o_usuario(self):
+        self.client.get('/navigation/')  # Primeira requisição lê a versão do token e guarda na cache
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/navigation/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['user_type'], 'TREINADOR')
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_mudanca_de_papel_revoga_o_token(self):
+        self.assertEqual(self.client.get('/navigation/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_type = 'ADMIN'
+            self.user.save()
+        self.assertEqual(self.client.get('/navigation/').status_code, 401)
+
+    def test_update_fields_grava_a_versao(self):
+        self.assertEqual(self.client.get('/navigation/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_type = 'ADMIN'
+            self.user.save(update_fields=['user_type'])
+        self.assertEqual(User.objects.get(pk=self.user.pk).versao_token, 1)
+        self.assertEqual(self.client.get('/navigation/').status_code, 401)
+
+    def test_save_de_instancia_antiga_nao_reativa_tokens(self):
+        antigo = User.objects.get(pk=self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(versao_token=F('versao_token') + 1)  # revogação em outro processo
+        antigo.first_name = 'Técnico'
+        antigo.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).versao_token, 1)
+
+    def test_login_depois_da_mudanca_recebe_a_versao_nova(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('nova')
+            self.user.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/', {'username': 'tecnico', 'password': 'nova'})
+        cliente = APIClient(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        self.assertEqual(cliente.get('/navigation/').status_code, 200)
+        self.assertEqual(self.client.get('/navigation/').status_code, 401)
+
+
+class GetCondicionalTests(TestCase):
+    """Polling sem mudanças recebe 304 só com a leitura dos contadores; qualquer gravação troca o ETag."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=3)
+        cls.user = User.objects.create_user('analista', password='senha', user_type='ADMIN')
+
+    def setUp(self):
+        cache.clear()
+        response = self.client.post('/', {'username': 'analista', 'password': 'senha'})
+        self.client = APIClient(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+
+    def revalidar(self, url):
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return etag, response, len(ctx.captured_queries)
+
+    def test_recurso_inalterado_responde_304_com_uma_query(self):
+        for url in (f'/clubes/{self.clubes[0].pk}/dashboard/', '/navigation/', '/jogadores/', '/partidas/'):
+            with self.subTest(url=url):
+                etag, response, queries = self.revalidar(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(queries, 0 if url == '/navigation/' else 1)
+
+    def test_gravacao_troca_o_etag(self):
+        url = f'/clubes/{self.clubes[0].pk}/dashboard/'
+        etag = self.client.get(url)['ETag']
+        partida = Partida.objects.filter(mandante=self.clubes[0]).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            partida.placar_visitante += 1
+            partida.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_transferencia_em_lote_troca_o_etag(self):
+        etag = self.client.get('/jogadores/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/jogadores/transferencia/', {
+                'clube_destino': self.clubes[1].pk, 'jogadores': [self.elencos[self.clubes[0].pk][0].pk],
+            }, format='json')
+        self.assertEqual(self.client.get('/jogadores/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_alteracao_de_outro_processo_troca_o_etag(self):
+        etag = self.client.get('/jogadores/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Jogador.objects.filter(pk=self.elencos[self.clubes[0].pk][0].pk).update(idade=40)
+            marcar_alteracao(Jogador)
+        # Um cliente que ainda não tinha lido o contador também vê a versão nova
+        cache.clear()
+        self.assertEqual(self.client.get('/jogadores/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(ContadorAlteracao.objects.get(modelo='backend.jogador').versao, 1)
+
+    def test_expand_acompanha_o_modelo_embutido(self):
+        url = '/jogadores/?expand=clube'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            clube = Clube.objects.get(pk=self.clubes[0].pk)
+            clube.nome = 'Alfa FC'
+            clube.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Alfa FC', {jogador['clube']['nome'] for jogador in response.json()['results']})
+
+    def test_um_update_dos_contadores_por_transacao(self):
+        partida = Partida.objects.filter(mandante=self.clubes[0]).first()
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    partida.delete()
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "backend_contadoralteracao"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            set(ContadorAlteracao.objects.values_list('modelo', flat=True)),
+            {'backend.partida', 'backend.estatisticaclube', 'backend.gol', 'backend.escalacao', 'backend.desempenho'},
+        )
+
+    def test_rollback_de_savepoint_nao_perde_a_alteracao(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        marcar_alteracao(Clube)
+                        raise ValueError
+                except ValueError:
+                    pass
+                marcar_alteracao(Jogador)
+        self.assertEqual(list(ContadorAlteracao.objects.values_list('modelo', flat=True)), ['backend.jogador'])
+
+    def test_filtros_tem_etags_diferentes(self):
+        self.assertNotEqual(self.client.get('/jogadores/')['ETag'], self.client.get('/jogadores/?posicao=Zagueiro')['ETag'])
+
+
+class CamposDinamicosTests(TestCase):
+    """?fields= e ?expand= reduzem a resposta e a consulta juntas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=3)
+        cls.user = User.objects.create_user('analista', password='senha', user_type='ADMIN')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def consultar(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # Só as consultas dos dados; a dos contadores do GET condicional fica de fora
+        return response.json(), [q['sql'] for q in ctx.captured_queries if 'backend_contadoralteracao' not in q['sql']]
+
+    def test_fields_restringe_resposta_e_colunas(self):
+        dados, queries = self.consultar('/jogadores/?fields=id,nome')
+        self.assertEqual(set(dados['results'][0]), {'id', 'nome'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"cpf"', queries[0])
+
+    def test_gols_da_partida_por_padrao(self):
+        dados, queries = self.consultar('/partidas/')
+        self.assertEqual(len(dados['results'][0]['gols']), 1)
+        self.assertIn('nome_autor', dados['results'][0]['gols'][0])
+        self.assertEqual(len(queries), 2)
+
+        dados, queries = self.consultar('/partidas/?fields=id,nome_mandante')
+        self.assertEqual(set(dados['results'][0]), {'id', 'nome_mandante'})
+        self.assertEqual(len(queries), 1)
+
+    def test_expand_de_chave_estrangeira_no_mesmo_select(self):
+        dados, queries = self.consultar('/jogadores/?fields=nome&expand=clube')
+        self.assertEqual(dados['results'][0]['clube']['nome'], 'Alfa')
+        self.assertEqual(len(queries), 1)
+
+    def test_campo_desconhecido(self):
+        response = self.client.get('/partidas/?expand=arbitro')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expand', response.json())
+
+
+class EstatisticaClubeTests(TestCase):
+    """A tabela materializada acompanha cada gravação de Partida e bate com o agregado ao vivo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=3)
+        cls.outra = Competicao.objects.create(
+            nome='Copa', tamanho='Pequeno', tipo_participantes='Clubes', divisao='1', tipo_formato='Copa'
+        )
+
+    def linha(self, clube, competicao):
+        return EstatisticaClube.objects.get(clube=clube, competicao=competicao)
+
+    def test_criacao_placar_competicao_e_remocao(self):
+        alfa, beta = self.clubes[:2]
+        partida = Partida.objects.create(
+            competicao=self.competicao, mandante=alfa, visitante=beta,
+            data_hora=datetime(2025, 6, 1, tzinfo=tz.utc), placar_mandante=2, placar_visitante=0,
+        )
+        self.assertEqual(divergencias_estatisticas(), [])
+        vitorias = self.linha(alfa, self.competicao).vitorias
+
+        partida.placar_visitante = 3
+        partida.save()
+        self.assertEqual(self.linha(alfa, self.competicao).vitorias, vitorias - 1)
+        self.assertEqual(divergencias_estatisticas(), [])
+
+        partida.competicao = self.outra
+        partida.save()
+        self.assertEqual(self.linha(beta, self.outra).vitorias, 1)
+        self.assertEqual(divergencias_estatisticas(), [])
+
+        partida.delete()
+        self.assertEqual(self.linha(beta, self.outra).jogos, 0)
+        self.assertEqual(divergencias_estatisticas(), [])
+
+
+    def tabela(self):
+        """Linhas da tabela sem as zeradas (o recálculo não grava clube sem jogo)."""
+        return {
+            (linha.pop('clube_id'), linha.pop('competicao_id')): linha
+            for linha in EstatisticaClube.objects.values('clube_id', 'competicao_id', *CAMPOS_ESTATISTICA)
+            if any(linha[campo] for campo in CAMPOS_ESTATISTICA)
+        }
+
+    def recalculada(self):
+        # Desfeito em seguida: o próximo passo continua sobre os deltas acumulados, não sobre o recálculo
+        with transaction.atomic():
+            recalcular_estatisticas()
+            linhas = self.tabela()
+            transaction.set_rollback(True)
+        return linhas
+
+    def test_deltas_pela_api_batem_com_o_recalculo(self):
+        alfa, beta = self.clubes[:2]
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', password='senha', user_type='ADMIN'))
+        passos = [
+            ('criação', lambda: client.post('/partidas/', {
+                'competicao': self.competicao.pk, 'mandante': alfa.pk, 'visitante': beta.pk,
+                'data_hora': '2025-06-01T16:00:00Z', 'placar_mandante': 1, 'placar_visitante': 1,
+            }, format='json')),
+            ('placar', lambda: client.patch(f'/partidas/{self.partida_id}/', {'placar_visitante': 2}, format='json')),
+            ('eventos', lambda: client.post(f'/partidas/{self.partida_id}/eventos/', {'eventos': [
+                {'tipo': 'gol', 'autor': self.elencos[alfa.pk][0].pk},
+                {'tipo': 'gol', 'autor': self.elencos[alfa.pk][1].pk},
+            ]}, format='json')),
+            ('competição', lambda: client.patch(f'/partidas/{self.partida_id}/', {'competicao': self.outra.pk}, format='json')),
+            ('remoção', lambda: client.delete(f'/partidas/{self.partida_id}/')),
+        ]
+        for nome, passo in passos:
+            with self.subTest(passo=nome):
+                response = passo()
+                self.assertLess(response.status_code, 300, response.content)
+                if nome == 'criação':
+                    self.partida_id = response.json()['id']
+                self.assertEqual(self.tabela(), self.recalculada())
+
+
+class ClassificacaoCacheTests(TestCase):
+    """A tabela em cache só troca de chave depois do commit, em qualquer processo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidacao_depois_do_commit(self):
+        alfa = self.clubes[0]
+        pontos = obter_classificacao(self.competicao.pk)[alfa.pk]['pontos']
+        partida = Partida.objects.filter(competicao=self.competicao, mandante=alfa).first()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            partida.placar_mandante, partida.placar_visitante = 0, 5
+            partida.save()
+            # Ainda dentro da transação: a versão em cache não mudou
+            self.assertEqual(obter_classificacao(self.competicao.pk)[alfa.pk]['pontos'], pontos)
+        self.assertTrue(callbacks)
+        self.assertLess(obter_classificacao(self.competicao.pk)[alfa.pk]['pontos'], pontos)
+
+    def test_gravacao_de_outro_processo_chega_com_o_etag_novo(self):
+        user = User.objects.create_user('analista', password='senha', user_type='ADMIN')
+        client = APIClient()
+        client.force_authenticate(user)
+        url = f'/competicoes/{self.competicao.pk}/classificacao/'
+        etag = client.get(url)['ETag']
+        # Outro processo: update sem sinais aqui e, depois do commit, o contador
+        alfa = self.clubes[0]
+        Partida.objects.filter(competicao=self.competicao, mandante=alfa).update(placar_mandante=9, placar_visitante=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            marcar_alteracao(Partida)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), client.get(url).json())
+        esperado = calcular_classificacao(self.competicao.pk)[alfa.pk]['pontos']
+        self.assertEqual(obter_classificacao(self.competicao.pk)[alfa.pk]['pontos'], esperado)
+
+
+class RankingCacheTests(TestCase):
+    """O ranking em cache acompanha os contadores do banco, então vê gravações de outros processos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=3)
+        cls.user = User.objects.create_user('analista', password='senha', user_type='ADMIN')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def gols(self, jogador):
+        return {linha['jogador'].pk: linha['gols'] for linha in obter_ranking('gols', limite=100)}.get(jogador.pk, 0)
+
+    def gravar_em_outro_processo(self, jogador, quantidade):
+        # Sem sinais neste processo: só os gols no banco e, depois do commit, o contador
+        partida = Partida.objects.filter(mandante=jogador.clube).first()
+        Gol.objects.bulk_create([
+            Gol(partida=partida, autor=jogador, minuto=minuto, clube=jogador.clube) for minuto in range(quantidade)
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            marcar_alteracao(Gol)
+
+    def test_gravacao_de_outro_processo(self):
+        artilheiro = self.elencos[self.clubes[0].pk][0]
+        antes = self.gols(artilheiro)
+        response = self.client.get('/ranking/', {'limite': 100})
+        etag = response['ETag']
+
+        self.gravar_em_outro_processo(artilheiro, 5)
+        self.assertEqual(self.gols(artilheiro), antes + 5)
+        response = self.client.get('/ranking/', {'limite': 100}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        gols = {linha['jogador']['id']: linha['gols'] for linha in response.json()['ranking']}
+        self.assertEqual(gols[artilheiro.pk], antes + 5)
+
+    def test_rollback_nao_troca_a_chave(self):
+        artilheiro = self.elencos[self.clubes[0].pk][0]
+        antes = self.gols(artilheiro)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Gol.objects.create(partida=Partida.objects.first(), autor=artilheiro, minuto=80, clube=artilheiro.clube)
+        # Sem commit o contador não sobe e o ranking segue o da cache
+        self.assertTrue(callbacks)
+        self.assertEqual(self.gols(artilheiro), antes)
+
+
+class ParametrosInvalidosTests(TestCase):
+    """Parâmetros de filtro malformados viram 400, não erro interno."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=1)
+        cls.user = User.objects.create_user('analista', password='senha', user_type='ADMIN')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_escalacao_com_clube_invalido(self):
+        partida = Partida.objects.first()
+        self.assertEqual(self.client.get(f'/partidas/{partida.pk}/escalacao/', {'clube': 'abc'}).status_code, 400)
+
+    def test_filtros_de_jogadores_invalidos(self):
+        for params in ({'clube': 'abc'}, {'idade_min': 'x'}, {'posicao': 'Libero'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/jogadores/', params).status_code, 400)
+        self.assertEqual(self.client.get('/jogadores/', {'clube': ''}).status_code, 200)
+
+
+class PlacarPorEventosTests(TestCase):
+    """Gols registrados ou removidos por qualquer caminho ajustam o placar via F(); gol contra não entra no ranking."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=1)
+        cls.alfa, cls.beta, cls.gama = cls.clubes
+        cls.user = User.objects.create_user('operador', password='senha', user_type='ADMIN')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.partida = Partida.objects.create(
+            competicao=self.competicao, mandante=self.alfa, visitante=self.beta,
+            data_hora=datetime(2025, 8, 1, tzinfo=tz.utc),
+        )
+
+    def placar(self):
+        self.partida.refresh_from_db()
+        return self.partida.placar_mandante, self.partida.placar_visitante
+
+    def eventos(self, *eventos):
+        return self.client.post(f'/partidas/{self.partida.pk}/eventos/', {'eventos': list(eventos)}, format='json')
+
+    def test_eventos_somam_e_revertem_o_placar(self):
+        atacante = self.elencos[self.alfa.pk][0]
+        response = self.eventos({'tipo': 'gol', 'autor': atacante.pk}, {'tipo': 'gol', 'autor': atacante.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.placar(), (2, 0))
+
+        response = self.eventos({'tipo': 'remover_gol', 'gol': response.json()['gols'][0]['id']})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.placar(), (1, 0))
+        self.assertEqual(divergencias_estatisticas(), [])
+
+    def test_crud_de_gols_ajusta_o_placar(self):
+        atacante = self.elencos[self.alfa.pk][0]
+        response = self.client.post('/gols/', {'partida': self.partida.pk, 'autor': atacante.pk, 'minuto': 10}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.placar(), (1, 0))
+
+        self.assertEqual(self.client.delete(f"/gols/{response.json()['id']}/").status_code, 204)
+        self.assertEqual(self.placar(), (0, 0))
+
+    def test_gol_contra_fica_fora_do_ranking(self):
+        zagueiro = self.elencos[self.beta.pk][0]
+        gols_antes = {linha['jogador'].pk: linha['gols'] for linha in obter_ranking('gols', limite=100)}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.eventos({'tipo': 'gol', 'autor': zagueiro.pk, 'clube': self.alfa.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.json()['gols'][0]['contra'])
+        self.assertEqual(self.placar(), (1, 0))
+        gols_depois = {linha['jogador'].pk: linha['gols'] for linha in obter_ranking('gols', limite=100)}
+        self.assertEqual(gols_depois.get(zagueiro.pk), gols_antes.get(zagueiro.pk))
+
+    def test_edicao_valida_o_novo_autor(self):
+        atacante, de_fora = self.elencos[self.alfa.pk][0], self.elencos[self.gama.pk][0]
+        gol = self.client.post('/gols/', {'partida': self.partida.pk, 'autor': atacante.pk}, format='json').json()
+        response = self.client.patch(f"/gols/{gol['id']}/", {'autor': de_fora.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(f"/gols/{gol['id']}/", {'autor': self.elencos[self.alfa.pk][1].pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.placar(), (1, 0))
+
+    def test_migracao_preenche_o_clube_dos_gols_antigos(self):
+        migracao = import_module('backend.migrations.0024_gol_clube_preenchido')
+        escalado, sem_escalacao = self.elencos[self.alfa.pk][0], self.elencos[self.beta.pk][0]
+        Escalacao.objects.create(partida=self.partida, clube=self.alfa, jogador=escalado, status='TITULAR')
+        antigos = Gol.objects.bulk_create([
+            Gol(partida=self.partida, autor=escalado, minuto=10),
+            Gol(partida=self.partida, autor=sem_escalacao, minuto=20),
+        ])
+        # Transferido depois do jogo: vale o lado em que foi escalado, não o clube atual
+        Jogador.objects.filter(pk=escalado.pk).update(clube=self.gama)
+        migracao.preencher_clube_dos_gols(django_apps, None)
+        self.assertEqual([Gol.objects.get(pk=gol.pk).clube_id for gol in antigos], [self.alfa.pk, self.beta.pk])
+
+    def test_autor_de_fora_da_partida(self):
+        de_fora = self.elencos[self.gama.pk][0]
+        response = self.eventos({'tipo': 'gol', 'autor': de_fora.pk, 'clube': self.alfa.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.placar(), (0, 0))
+
+
+class DesempenhosLoteTests(TestCase):
+    """O upsert em lote só sobrescreve os campos enviados."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=1)
+        cls.user = User.objects.create_user('analista', password='senha', user_type='ADMIN')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reenvio_so_da_nota_preserva_gols(self):
+        partida = Partida.objects.first()
+        jogador = self.elencos[partida.mandante_id][0]
+        url = f'/partidas/{partida.pk}/desempenhos/'
+        self.client.post(url, {'desempenhos': [{'jogador': jogador.pk, 'nota': 7, 'gols': 2, 'assistencias': 1}]}, format='json')
+        response = self.client.post(url, {'desempenhos': [{'jogador': jogador.pk, 'nota': 9}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        desempenho = Desempenho.objects.get(partida=partida, jogador=jogador)
+        self.assertEqual((desempenho.nota, desempenho.gols, desempenho.assistencias), (9, 2, 1))
+
+
+
+class EscalacaoLoteTests(TestCase):
+    """O PUT da escalação cria, atualiza e remove num número fixo de queries, seja qual for o tamanho do elenco."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=1)
+        cls.partida = Partida.objects.get()
+        cls.alfa = cls.clubes[0]
+        cls.reforco = Jogador.objects.create(
+            nome='Alfa 3', cpf=f'{cls.alfa.id}003', idade=22, peso=70, altura=1.8,
+            nacionalidade='Brasil', posicao='Zagueiro', perna='Destro', clube=cls.alfa,
+        )
+        cls.user = User.objects.create_user('analista', password='senha', user_type='ADMIN')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cria_atualiza_e_remove_de_uma_vez(self):
+        mantido, rebaixado, removido = self.elencos[self.alfa.id]
+        jogadores = [
+            {'jogador': mantido.pk, 'status': 'TITULAR', 'x': 50, 'y': 50},
+            {'jogador': rebaixado.pk, 'status': 'RESERVA', 'x': 10, 'y': 90},
+            {'jogador': self.reforco.pk, 'status': 'TITULAR', 'x': 30, 'y': 40},
+        ]
+        # partida, jogadores do clube, savepoint, linhas atuais, delete (busca + apaga),
+        # bulk_update, bulk_create, releitura e release
+        with self.assertNumQueries(10):
+            response = self.client.put(
+                f'/partidas/{self.partida.pk}/escalacao/', {'clube': self.alfa.pk, 'jogadores': jogadores}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {k: response.json()[k] for k in ('criados', 'atualizados', 'removidos')},
+            {'criados': 1, 'atualizados': 1, 'removidos': 1},
+        )
+        linhas = dict(
+            Escalacao.objects.filter(partida=self.partida, clube=self.alfa).values_list('jogador_id', 'status')
+        )
+        self.assertEqual(linhas, {mantido.pk: 'TITULAR', rebaixado.pk: 'RESERVA', self.reforco.pk: 'TITULAR'})
+        self.assertNotIn(removido.pk, [e['jogador'] for e in response.json()['escalacao']])
+
+
+def png(cor, tamanho=16):
+    buffer = BytesIO()
+    Image.new('RGB', (tamanho, tamanho), cor).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class VariantesImagemTests(TestCase):
+    """O hash das variantes acompanha o arquivo atual, venha ele de upload ou do storage."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.clube = Clube.objects.create(
+            nome='Alfa', pais='Brasil', ano_fundacao=1900, escudo=SimpleUploadedFile('a.png', png('red')),
+        )
+
+    def test_upload_gera_variantes(self):
+        self.assertEqual(self.clube.escudo_hash, gerar_variantes_de_bytes(png('red')))
+
+    def test_arquivo_atribuido_pelo_nome(self):
+        nome = default_storage.save('escudos/b.png', ContentFile(png('blue')))
+        self.clube.escudo = nome
+        self.clube.save()
+        self.clube.refresh_from_db()
+        self.assertEqual(self.clube.escudo_hash, gerar_variantes_de_bytes(png('blue')))
+
+    def test_imagem_grande_demais(self):
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 10):
+            self.clube.escudo = SimpleUploadedFile('c.png', png('green'))
+            self.clube.save()
+        self.assertEqual(self.clube.escudo_hash, '')
+
+
+class MidiaTests(TestCase):
+    """Arquivos do MEDIA_ROOT com Range de um trecho, 304 e caminhos fora da pasta recusados."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        default_storage.save('escudos/a.txt', ContentFile(b'0123456789'))
+
+    def get(self, caminho='escudos/a.txt', **cabecalhos):
+        return self.client.get(f'/media/{caminho}', headers=cabecalhos)
+
+    def corpo(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_trecho(self):
+        for intervalo, corpo, content_range in (
+            ('bytes=2-4', b'234', 'bytes 2-4/10'),
+            ('bytes=-3', b'789', 'bytes 7-9/10'),
+            ('bytes=7-', b'789', 'bytes 7-9/10'),
+            ('bytes=8-50', b'89', 'bytes 8-9/10'),
+        ):
+            with self.subTest(intervalo=intervalo):
+                response = self.get(Range=intervalo)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(self.corpo(response), corpo)
+                self.assertEqual(response['Content-Range'], content_range)
+
+    def test_trecho_fora_do_arquivo(self):
+        response = self.get(Range='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_range_invalido_entrega_o_arquivo_inteiro(self):
+        for intervalo in ('bytes=3-1', 'bytes=0-1,4-5', 'linhas=1-2'):
+            with self.subTest(intervalo=intervalo):
+                response = self.get(Range=intervalo)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.corpo(response), b'0123456789')
+
+    def test_if_none_match(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(**{'If-None-Match': etag}).status_code, 304)
+
+    def test_caminho_fora_do_media_root(self):
+        for caminho in ('..%2Fmanage.py', '../../manage.py', 'escudos'):
+            with self.subTest(caminho=caminho):
+                self.assertEqual(self.get(caminho).status_code, 404)
+
+
+class ResetEscalacoesTests(TestCase):
+    """O reset em lotes apaga só o escopo pedido e ainda avisa contadores e tempo real, que os sinais não veem."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=3)
+        cls.alfa, cls.beta, cls.gama = cls.clubes
+        cls.partida = Partida.objects.get(mandante=cls.alfa, visitante=cls.beta)
+        for jogador in cls.elencos[cls.beta.pk]:
+            Escalacao.objects.create(partida=cls.partida, clube=cls.beta, jogador=jogador, status='TITULAR')
+        cls.admin = User.objects.create_user('admin', password='senha', user_type='ADMIN')
+        cls.treinador = User.objects.create_user('tecnico', password='senha', user_type='TREINADOR', clube=cls.alfa)
+
+    def resetar(self, user, **escopo):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post('/escalacoes/resetar/', escopo, format='json')
+
+    def test_so_o_escopo_pedido(self):
+        fora = set(Escalacao.objects.exclude(partida=self.partida, clube=self.alfa).values_list('id', flat=True))
+        response = self.resetar(self.admin, partida=self.partida.pk, clube=self.alfa.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['removidas'], 3)
+        self.assertEqual(set(Escalacao.objects.values_list('id', flat=True)), fora)
+
+    def test_lotes(self):
+        progresso = []
+        resultado = resetar_escalacoes(
+            escalacoes_no_escopo(inicio=date(2024, 1, 1)),
+            tamanho_lote=4, progresso=lambda removidas, total: progresso.append((removidas, total)),
+        )
+        # 12 linhas em lotes de 4, sem pular nem repetir ids entre os lotes
+        self.assertEqual(resultado, {'removidas': 12, 'lotes': 3})
+        self.assertEqual(progresso, [(4, 12), (8, 12), (12, 12)])
+        self.assertFalse(Escalacao.objects.exists())
+
+    def test_treinador_so_reseta_o_proprio_clube(self):
+        response = self.resetar(self.treinador, partida=self.partida.pk, clube=self.beta.pk)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Escalacao.objects.filter(partida=self.partida).count(), 6)
+
+        response = self.resetar(self.treinador, partida=self.partida.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(Escalacao.objects.filter(partida=self.partida).values_list('clube_id', flat=True)), {self.beta.pk})
+
+    def test_contadores_e_tempo_real(self):
+        with mock.patch.object(tempo_real.broker, 'publicar') as publicar:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.resetar(self.admin, partida=self.partida.pk)
+        eventos = sorted((chamada.args[0], chamada.args[1]['clube']) for chamada in publicar.call_args_list)
+        self.assertEqual(eventos, sorted([(self.partida.pk, self.alfa.pk), (self.partida.pk, self.beta.pk)]))
+        self.assertTrue(all(chamada.args[1]['escalacao'] == [] for chamada in publicar.call_args_list))
+        self.assertTrue(ContadorAlteracao.objects.filter(modelo='backend.escalacao').exists())
+
+
+class TempoRealTests(TestCase):
+    """O broker só guarda estado de partidas com espectadores; o SSE entrega o estado e depois os deltas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=1)
+        cls.partida = Partida.objects.get()
+        User.objects.create_user('espectador', password='senha')
+
+    def setUp(self):
+        cache.clear()
+        self.token = self.client.post('/', {'username': 'espectador', 'password': 'senha'}).json()['access']
+
+    async def test_broker_descarta_a_partida_sem_espectadores(self):
+        broker = tempo_real.BrokerMemoria()
+        broker.publicar(1, {'tipo': 'placar'})
+        self.assertEqual(broker._sequencias, {})
+
+        fila = broker.assinar(1)
+        broker.publicar(1, {'tipo': 'placar', 'placar_mandante': 1})
+        broker.publicar(2, {'tipo': 'placar'})
+        sequencia, tipo, dados = await asyncio.wait_for(fila.get(), timeout=1)
+        self.assertEqual((sequencia, tipo, json.loads(dados)['placar_mandante']), (1, 'placar', 1))
+
+        broker.cancelar(1, fila)
+        self.assertEqual((broker.assinantes(1), dict(broker._assinantes), dict(broker._sequencias)), (0, {}, {}))
+
+    async def test_fila_cheia_descarta_sem_bloquear(self):
+        broker = tempo_real.BrokerMemoria(tamanho_fila=1)
+        fila = broker.assinar(1)
+        broker.publicar(1, {'tipo': 'placar'})
+        broker.publicar(1, {'tipo': 'placar'})
+        await asyncio.sleep(0)
+        self.assertEqual(fila.qsize(), 1)
+        broker.cancelar(1, fila)
+
+    async def test_sse_envia_estado_e_deltas(self):
+        response = await self.async_client.get(
+            f'/partidas/{self.partida.pk}/tempo-real/', headers={'Authorization': f'Bearer {self.token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        estado = await anext(stream)
+        self.assertTrue(estado.startswith(b'id: 0\nevent: estado\n'))
+        self.assertEqual(tempo_real.broker.assinantes(self.partida.pk), 1)
+
+        tempo_real.broker.publicar(self.partida.pk, {'tipo': 'placar', 'partida': self.partida.pk})
+        delta = await asyncio.wait_for(anext(stream), timeout=1)
+        self.assertRegex(delta.decode(), r'^id: 1\nevent: placar\ndata: \{.*\}\n\n$')
+
+        # Desconexão: o handler ASGI cancela a task que espera o próximo evento
+        leitura = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        leitura.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await leitura
+        self.assertEqual(tempo_real.broker.assinantes(self.partida.pk), 0)
+        self.assertNotIn(self.partida.pk, tempo_real.broker._sequencias)
+
+    async def test_sse_exige_token_e_partida(self):
+        response = await self.async_client.get(f'/partidas/{self.partida.pk}/tempo-real/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get('/partidas/999/tempo-real/', {'token': self.token})
+        self.assertEqual(response.status_code, 404)
+
+
+class ConfiguracaoBancoTests(SimpleTestCase):
+    """As opções do SQLite: a conexão de leitura abre transações sem pedir o lock de escrita."""
+
+    def setUp(self):
+        self.opcoes = import_module('protactic.settings').sqlite_options
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, ignore_errors=True)
+        self.arquivo = f'{diretorio}/banco.sqlite3'
+        with sqlite3.connect(self.arquivo) as bruto:
+            bruto.execute('CREATE TABLE t (x INTEGER)')
+            bruto.execute('INSERT INTO t VALUES (1)')
+        bruto.close()
+
+    def na_conexao_de_leitura(self, codigo):
+        """Roda `codigo` num processo com DB_LEITURA_SEPARADA ligado, como o settings real configura."""
+        ambiente = {**os.environ, 'DB_NAME': self.arquivo, 'DB_LEITURA_SEPARADA': '1', 'DJANGO_SETTINGS_MODULE': 'protactic.settings'}
+        script = 'import django; django.setup()\nfrom django.db import connections, transaction\n' + codigo
+        resultado = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=ambiente, capture_output=True, text=True,
+        )
+        self.assertEqual(resultado.returncode, 0, resultado.stderr)
+        return resultado.stdout.strip()
+
+    def test_opcoes(self):
+        escrita, leitura = self.opcoes(), self.opcoes(somente_leitura=True)
+        self.assertEqual(escrita['transaction_mode'], 'IMMEDIATE')
+        self.assertIn('PRAGMA journal_mode=', escrita['init_command'])
+        self.assertNotIn('transaction_mode', leitura)
+        self.assertNotIn('journal_mode', leitura['init_command'])
+        self.assertIn('PRAGMA query_only=ON;', leitura['init_command'])
+
+    def test_atomic_na_conexao_de_leitura(self):
+        saida = self.na_conexao_de_leitura(
+            "with transaction.atomic(using='leitura'):\n"
+            "    with connections['leitura'].cursor() as cursor:\n"
+            "        cursor.execute('SELECT x FROM t')\n"
+            "        print(cursor.fetchall())\n"
+        )
+        self.assertEqual(saida, '[(1,)]')
+
+    def test_conexao_de_leitura_recusa_escrita(self):
+        saida = self.na_conexao_de_leitura(
+            "from django.db import OperationalError\n"
+            "try:\n"
+            "    connections['leitura'].cursor().execute('INSERT INTO t VALUES (2)')\n"
+            "except OperationalError:\n"
+            "    print('recusada')\n"
+        )
+        self.assertEqual(saida, 'recusada')
+
+
+class BuscaTests(TestCase):
+    """Índice de busca sem acento e por prefixo, mantido pelos sinais, e a cache do autocomplete."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sao_paulo = Clube.objects.create(nome='São Paulo', pais='Brasil', ano_fundacao=1930)
+        cls.santos = Clube.objects.create(nome='Santos', pais='Brasil', ano_fundacao=1912)
+        cls.joao = cls.jogador('João Silva', cls.sao_paulo)
+        cls.joana = cls.jogador('Joana Silveira', cls.santos)
+        cls.silvio = cls.jogador('Silvio Santos', cls.santos)
+        cls.user = User.objects.create_user('admin', password='senha')
+
+    @classmethod
+    def jogador(cls, nome, clube):
+        return Jogador.objects.create(
+            nome=nome, cpf=nome[:11], idade=25, peso=70, altura=1.8,
+            nacionalidade='Brasil', posicao='Zagueiro', perna='Destro', clube=clube,
+        )
+
+    def setUp(self):
+        autocomplete.limpar()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def nomes(self, termo):
+        return [(r['tipo'], r['nome']) for r in self.client.get('/busca/', {'q': termo}).json()]
+
+    def test_ignora_acento_e_caixa(self):
+        self.assertEqual(self.nomes('JOÃO'), [('JOGADOR', 'João Silva')])
+        self.assertEqual(self.nomes('joao'), [('JOGADOR', 'João Silva')])
+        self.assertEqual(self.nomes('sao'), [('CLUBE', 'São Paulo')])
+
+    def test_prefixo_de_cada_palavra(self):
+        # Palavra exata antes de prefixo, primeira palavra antes das demais
+        self.assertEqual(
+            self.nomes('silv'),
+            [('JOGADOR', 'Silvio Santos'), ('JOGADOR', 'João Silva'), ('JOGADOR', 'Joana Silveira')],
+        )
+        self.assertEqual(self.nomes('jo silve'), [('JOGADOR', 'Joana Silveira')])
+        self.assertEqual(self.nomes('jo santos'), [])
+
+    def test_indice_acompanha_save_e_delete(self):
+        self.assertEqual(self.nomes('santos'), [('JOGADOR', 'Silvio Santos'), ('CLUBE', 'Santos')])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.silvio.nome = 'Sílvio Sampaio'
+            self.silvio.save()
+        self.assertEqual(self.nomes('santos'), [('CLUBE', 'Santos')])
+        self.assertEqual(self.nomes('sampaio'), [('JOGADOR', 'Sílvio Sampaio')])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.santos.delete()
+        self.assertEqual(self.nomes('santos'), [])
+        self.assertFalse(IndiceBusca.objects.filter(tipo='CLUBE', objeto_id=self.santos.pk).exists())
+
+    def test_termo_mais_longo_reaproveita_o_prefixo_em_cache(self):
+        autocomplete.buscar('s', limite=5)
+        with self.assertNumQueries(0):
+            estreitado = autocomplete.buscar('silve', limite=5)
+        self.assertEqual(estreitado, resultados_compactos('silve', limite=5))
+
+        autocomplete.buscar('jo', limite=5)
+        with self.assertNumQueries(0):
+            estreitado = autocomplete.buscar('jo sil', limite=5)
+        self.assertEqual(estreitado, resultados_compactos('jo sil', limite=5))
+
+    def test_tipo_que_encheu_o_limite_vai_ao_banco(self):
+        # 's' trouxe 3 jogadores com limite 3: a lista pode estar cortada, então só esse tipo é refeito
+        autocomplete.buscar('s', limite=3)
+        with CaptureQueriesContext(connection) as ctx:
+            estreitado = autocomplete.buscar('silv', limite=3)
+        self.assertEqual(estreitado, resultados_compactos('silv', limite=3))
+        self.assertTrue(ctx.captured_queries)
+        self.assertTrue(all("'JOGADOR'" in q['sql'] or 'backend_jogador' in q['sql'] for q in ctx.captured_queries))
+
+
+class TransferenciaTests(TestCase):
+    """A transferência em lote: escalações futuras saem, o passado fica, rankings e busca acompanham."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clubes, cls.competicao, cls.elencos = criar_dados(partidas=3)
+        cls.alfa, cls.beta, cls.gama = cls.clubes
+        cls.artilheiro = cls.elencos[cls.alfa.pk][0]
+        cls.futura = Partida.objects.create(
+            competicao=cls.competicao, mandante=cls.alfa, visitante=cls.beta,
+            data_hora=datetime.now(tz.utc) + timedelta(days=7),
+        )
+        for jogador in cls.elencos[cls.alfa.pk]:
+            Escalacao.objects.create(partida=cls.futura, clube=cls.alfa, jogador=jogador, status='TITULAR')
+        cls.user = User.objects.create_user('admin', password='senha', user_type='ADMIN')
+
+    def setUp(self):
+        cache.clear()
+        autocomplete.limpar()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def transferir(self, *jogadores, destino):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/jogadores/transferencia/', {'clube_destino': destino.pk, 'jogadores': [j.pk for j in jogadores]}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def artilheiros(self, clube):
+        return [linha['jogador'].pk for linha in obter_ranking('gols', 'clube', clube.pk, limite=100)]
+
+    def test_escalacoes_futuras_saem_e_o_passado_fica(self):
+        passadas = set(Escalacao.objects.filter(jogador=self.artilheiro).exclude(partida=self.futura).values_list('id', flat=True))
+        resultado = self.transferir(self.artilheiro, destino=self.gama)
+        self.assertEqual(resultado, {
+            'clube_destino': self.gama.pk, 'transferidos': 1, 'escalacoes_removidas': 1, 'clubes_origem': [self.alfa.pk],
+        })
+        self.assertEqual(set(Escalacao.objects.filter(jogador=self.artilheiro).values_list('id', flat=True)), passadas)
+        self.assertEqual(Escalacao.objects.filter(partida=self.futura).count(), 2)
+        # Os gols já marcados continuam do lado em que foram feitos
+        self.assertEqual(set(Gol.objects.filter(autor=self.artilheiro).values_list('clube_id', flat=True)), {self.alfa.pk})
+
+    def test_ranking_por_clube_acompanha(self):
+        self.assertIn(self.artilheiro.pk, self.artilheiros(self.alfa))
+        self.assertNotIn(self.artilheiro.pk, self.artilheiros(self.gama))
+        self.transferir(self.artilheiro, destino=self.gama)
+        self.assertNotIn(self.artilheiro.pk, self.artilheiros(self.alfa))
+        self.assertIn(self.artilheiro.pk, self.artilheiros(self.gama))
+
+    def test_busca_acompanha(self):
+        busca = self.client.get('/busca/', {'q': self.artilheiro.nome}).json()
+        self.assertIn(self.artilheiro.pk, [r['id'] for r in busca if r['tipo'] == 'JOGADOR'])
+        self.transferir(self.artilheiro, destino=self.gama)
+
+        response = self.client.get('/jogadores/', {'clube': self.gama.pk, 'search': self.artilheiro.nome})
+        self.assertEqual([j['id'] for j in response.json()['results']], [self.artilheiro.pk])
+        response = self.client.get('/jogadores/', {'clube': self.alfa.pk, 'search': self.artilheiro.nome})
+        self.assertEqual(response.json()['results'], [])
+        self.assertEqual(self.client.get('/busca/', {'q': self.artilheiro.nome}).json(), busca)
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .condicional import marcar_alteracao
+from .models import Escalacao, Jogador
+
+# Filtros aceitos na seleção de jogadores e o lookup de cada um
+FILTROS = {
+    'clube': 'clube_id',
+    'posicao': 'posicao',
+    'perna': 'perna',
+    'nacionalidade': 'nacionalidade',
+    'idade_min': 'idade__gte',
+    'idade_max': 'idade__lte',
+}
+
+
+def selecionar_jogadores(queryset=None, ids=(), cpfs=(), filtro=None):
+    """Jogadores por id ou CPF (união), restritos pelos filtros informados."""
+    queryset = Jogador.objects.all() if queryset is None else queryset
+    if ids or cpfs:
+        queryset = queryset.filter(Q(id__in=list(ids)) | Q(cpf__in=list(cpfs)))
+    for campo, valor in (filtro or {}).items():
+        if valor is not None:
+            queryset = queryset.filter(**{FILTROS[campo]: valor})
+    return queryset
+
+
+def transferir_jogadores(jogadores, clube_destino_id, agora=None):
+    """
+    Move os jogadores do queryset para o clube de destino com um único UPDATE.
+
+    Na mesma transação apaga as escalações deles pelo clube antigo em partidas
+    que ainda não aconteceram, que deixariam de fazer sentido.
+    """
+    agora = agora or timezone.now()
+    with transaction.atomic():
+        movidos = jogadores.exclude(clube_id=clube_destino_id)
+        origens = set(movidos.values_list('clube_id', flat=True).distinct())
+        if not origens:
+            return {'transferidos': 0, 'escalacoes_removidas': 0, 'clubes_origem': []}
+
+        # delete() normal para os assinantes do tempo real receberem 'jogador_removido'
+        removidas, _ = Escalacao.objects.filter(
+            jogador__in=movidos.values('id'), partida__data_hora__gt=agora
+        ).exclude(clube_id=clube_destino_id).delete()
+        transferidos = movidos.update(clube_id=clube_destino_id)
+
+        # update() não dispara os sinais do Jogador: o contador troca aqui as chaves dos
+        # rankings por clube. O índice de busca só guarda o nome, que não mudou.
+        marcar_alteracao(Jogador)
+
+    return {'transferidos': transferidos, 'escalacoes_removidas': removidas, 'clubes_origem': sorted(origens)}
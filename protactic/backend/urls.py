@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import LoginView, NavigationView, ClubeViewSet, JogadorViewSet, CompeticaoViewSet, BuscaGlobalView, PartidaViewSet, GolViewSet, EscalacaoViewSet, DesempenhoViewSet, ClubeDashboardView, CompeticaoTimesView, CompeticaoClubeStatsView
+from .views import LoginView, NavigationView, ClubeViewSet, JogadorViewSet, CompeticaoViewSet, BuscaGlobalView, PartidaViewSet, GolViewSet, EscalacaoViewSet, DesempenhoViewSet, ClubeDashboardView, CompeticaoTimesView, CompeticaoClubeStatsView, CompeticaoClassificacaoView, RankingView, PartidaEscalacaoView, PartidaTempoRealView, PartidaEventosView, PartidaDesempenhosView, JogadorEstatisticasView, JogadorTransferenciaView
 
 router = DefaultRouter()
 router.register(r'clubes', ClubeViewSet)
@@ -15,8 +15,18 @@ urlpatterns = [
     path('', LoginView.as_view(), name='login'),
     path("navigation/", NavigationView.as_view(), name="navigation"),
     path('competicoes/<int:pk>/times/', CompeticaoTimesView.as_view(), name='competicao_times'),
+    path('competicoes/<int:pk>/classificacao/', CompeticaoClassificacaoView.as_view(), name='competicao_classificacao'),
     path('competicoes/<int:competicao_id>/clubes/<int:clube_id>/estatisticas/', CompeticaoClubeStatsView.as_view(), name='competicao_clube_stats'),
+    path('competicoes/<int:competicao_id>/ranking/', RankingView.as_view(), name='ranking_competicao'),
+    path('clubes/<int:clube_id>/ranking/', RankingView.as_view(), name='ranking_clube'),
+    path('ranking/', RankingView.as_view(), name='ranking'),
+    path('jogadores/estatisticas/', JogadorEstatisticasView.as_view(), name='jogador_estatisticas'),
+    path('jogadores/transferencia/', JogadorTransferenciaView.as_view(), name='jogador_transferencia'),
+    path('partidas/<int:pk>/escalacao/', PartidaEscalacaoView.as_view(), name='partida_escalacao'),
+    path('partidas/<int:pk>/desempenhos/', PartidaDesempenhosView.as_view(), name='partida_desempenhos'),
+    path('partidas/<int:pk>/eventos/', PartidaEventosView.as_view(), name='partida_eventos'),
+    path('partidas/<int:pk>/tempo-real/', PartidaTempoRealView.as_view(), name='partida_tempo_real'),
     path('', include(router.urls)),
     path('busca/', BuscaGlobalView.as_view(), name='busca_global'),
-    path('clubes/<int:pk>/dashboard/', ClubeDashboardView.as_view())
+    path('clubes/<int:pk>/dashboard/', ClubeDashboardView.as_view(), name='clube_dashboard')
 ]
\ No newline at end of file
@@ -4,12 +4,54 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import viewsets
-from .models import Clube, Desempenho, Jogador, Competicao, Partida, Gol, Escalacao
-from .serializers import ClubeSerializer,ArtilheiroSerializer, DesempenhoSerializer, JogadorSerializer, CompeticaoSerializer, PartidaSerializer, GolSerializer, EscalacaoSerializer
-from django.db.models import Q, F, Count, Case, When, IntegerField
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from .models import Clube, Desempenho, Jogador, Competicao, Partida, Gol, Escalacao, EstatisticaClube
+from .serializers import ClubeSerializer,ArtilheiroSerializer, DesempenhoSerializer, JogadorSerializer, CompeticaoSerializer, PartidaSerializer, GolSerializer, EscalacaoSerializer, EscalacaoLoteSerializer, EventosPartidaSerializer, DesempenhoItemSerializer, FiltroJogadoresSerializer, TransferenciaSerializer, ResetEscalacoesSerializer
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+from django.core.files.storage import default_storage
 from .navigation import build_navigation_for_user
+from .eventos import EventoInvalido, erro_gol, registrar_eventos
+from .elenco import JANELAS_PADRAO, estatisticas_jogadores
+from . import tempo_real
+from .pagination import JogadorCursorPagination, PartidaCursorPagination
+from .transferencias import FILTROS, selecionar_jogadores, transferir_jogadores
+from .escalacoes import escalacoes_no_escopo, resetar_escalacoes
+from .busca import autocomplete, filtrar_por_termo
+from .rankings import LIMITE_MAXIMO, LIMITE_PADRAO, TIPOS_RANKING, obter_ranking
+from .classificacao import CRITERIOS, CRITERIOS_PADRAO, obter_classificacao, ordenar_classificacao
+from .imagens import PASTA_VARIANTES
+from .autenticacao import JWTAutenticacaoToken, adicionar_claims
+from .condicional import GetCondicionalMixin, marcar_alteracao
+from .campos import CamposDinamicosViewSetMixin
+import mimetypes
+import os
+import re
+import stat
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
 class CustomTokenSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # As mesmas informações da resposta, dentro do token (ver backend/autenticacao.py)
+        return adicionar_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
 
@@ -22,8 +64,9 @@ class CustomTokenSerializer(TokenObtainPairSerializer):
 class LoginView(TokenObtainPairView):
     serializer_class = CustomTokenSerializer
 
-class NavigationView(APIView):
+class NavigationView(GetCondicionalMixin, APIView):
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = ()
 
     def get(self, request):
         u = request.user
@@ -37,13 +80,15 @@ class NavigationView(APIView):
         }
         return Response(data)
 
-class ClubeViewSet(viewsets.ModelViewSet):
+class ClubeViewSet(CamposDinamicosViewSetMixin, GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Clube.objects.all()
     serializer_class = ClubeSerializer
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Clube,)
 
-class ClubeDashboardView(APIView):
+class ClubeDashboardView(GetCondicionalMixin, APIView):
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Clube, EstatisticaClube, Partida, Gol, Jogador)
 
     def get(self, request, pk):
         try:
@@ -51,32 +96,27 @@ class ClubeDashboardView(APIView):
         except Clube.DoesNotExist:
             return Response({"error": "Clube não encontrado"}, status=404)
 
-        # 1. Dados Estatísticos Gerais (Aggregation)
-        stats = Partida.objects.filter(Q(mandante=clube) | Q(visitante=clube)).aggregate(
-            total=Count('id'),
-            vitorias=Count('id', filter=Q(
-                (Q(mandante=clube) & Q(placar_mandante__gt=F('placar_visitante'))) |
-                (Q(visitante=clube) & Q(placar_visitante__gt=F('placar_mandante')))
-            )),
-            derrotas=Count('id', filter=Q(
-                (Q(mandante=clube) & Q(placar_mandante__lt=F('placar_visitante'))) |
-                (Q(visitante=clube) & Q(placar_visitante__lt=F('placar_mandante')))
-            )),
+        # 1. Dados Estatísticos Gerais (tabela materializada, uma linha por competição)
+        stats = EstatisticaClube.objects.filter(clube=clube).aggregate(
+            total=Coalesce(Sum('jogos'), 0),
+            vitorias=Coalesce(Sum('vitorias'), 0),
+            empates=Coalesce(Sum('empates'), 0),
+            derrotas=Coalesce(Sum('derrotas'), 0),
         )
 
         total = stats['total']
         vitorias = stats['vitorias']
         derrotas = stats['derrotas']
-        empates = total - (vitorias + derrotas)
+        empates = stats['empates']
 
         # 2. Histórico Geral (Últimas 5 Partidas)
         historico_query = Partida.objects.filter(
             Q(mandante=clube) | Q(visitante=clube)
-        ).order_by('-data_hora')[:5]
+        ).select_related('mandante', 'visitante').order_by('-data_hora')[:5]
 
         historico_partidas = []
         for p in historico_query:
-            if p.mandante == clube:
+            if p.mandante_id == clube.id:
                 adversario = p.visitante.nome
                 placar = f"{p.placar_mandante} - {p.placar_visitante}"
                 res = 'V' if p.placar_mandante > p.placar_visitante else ('D' if p.placar_mandante < p.placar_visitante else 'E')
@@ -108,27 +148,108 @@ class ClubeDashboardView(APIView):
                 "empates": empates,
                 "aproveitamento": round(((vitorias * 3 + empates) / (total * 3) * 100), 1) if total > 0 else 0
             },
-            "historico_partidas": historico_partidas
+            "historico_partidas": historico_partidas,
+            "artilheiros": ArtilheiroSerializer([
+                {"nome": linha['jogador'].nome, "gols": linha['gols'], "posicao": linha['jogador'].posicao}
+                for linha in obter_ranking('gols', 'clube', clube.pk, limite=5)
+            ], many=True).data
         })
 
-class JogadorViewSet(viewsets.ModelViewSet):
+class JogadorViewSet(CamposDinamicosViewSetMixin, GetCondicionalMixin, viewsets.ModelViewSet):
     serializer_class = JogadorSerializer
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Jogador,)
+    pagination_class = JogadorCursorPagination
+    filter_backends = [OrderingFilter]
+    ordering_fields = ['nome', 'idade', 'posicao', 'altura', 'peso', 'nacionalidade']
+    ordering = ['nome']
 
     def get_queryset(self):
         user = self.request.user
-        if user.user_type == 'TREINADOR' and user.clube:
-            return Jogador.objects.filter(clube=user.clube)
-        return Jogador.objects.all()
+        if user.user_type == 'TREINADOR' and user.clube_id:
+            queryset = Jogador.objects.filter(clube_id=user.clube_id)
+        else:
+            queryset = Jogador.objects.all()
+
+        if self.action != 'list':
+            return queryset
+
+        params = self.request.query_params
+        # Mesmos filtros da transferência em lote; valor malformado vira 400 (parâmetro vazio é ignorado)
+        filtro = FiltroJogadoresSerializer(data={campo: params[campo] for campo in FILTROS if params.get(campo)})
+        filtro.is_valid(raise_exception=True)
+        queryset = selecionar_jogadores(queryset, filtro=filtro.validated_data)
+
+        # Busca pelo índice sem acento (ver backend/busca.py)
+        termo = params.get('search')
+        if termo:
+            queryset = filtrar_por_termo(queryset, 'JOGADOR', termo)
+        return queryset
+
+
+class JogadorTransferenciaView(APIView):
+    """Transfere vários jogadores (por id, CPF ou filtro) para um clube de uma vez."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = TransferenciaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+
+        if not Clube.objects.filter(pk=dados['clube_destino']).exists():
+            return Response({"error": "Clube de destino não encontrado"}, status=404)
+
+        # Treinador só movimenta jogadores do próprio clube
+        user = request.user
+        jogadores = Jogador.objects.all()
+        if user.user_type == 'TREINADOR' and user.clube_id:
+            jogadores = jogadores.filter(clube_id=user.clube_id)
+        jogadores = selecionar_jogadores(jogadores, dados['jogadores'], dados['cpfs'], dados.get('filtro'))
+
+        resultado = transferir_jogadores(jogadores, dados['clube_destino'])
+        return Response({"clube_destino": dados['clube_destino'], **resultado})
 
+class JogadorEstatisticasView(GetCondicionalMixin, APIView):
+    """Estatísticas de temporada/carreira e forma recente de um elenco inteiro numa só requisição."""
+    permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Jogador, Partida, Gol, Escalacao, Desempenho)
+
+    def get(self, request):
+        user = request.user
+        jogadores = Jogador.objects.all()
+        if user.user_type == 'TREINADOR' and user.clube_id:
+            jogadores = jogadores.filter(clube_id=user.clube_id)
 
-class CompeticaoViewSet(viewsets.ModelViewSet):
+        try:
+            clube_id = request.query_params.get('clube')
+            if clube_id:
+                jogadores = jogadores.filter(clube_id=int(clube_id))
+            ids = request.query_params.get('ids')
+            if ids:
+                jogadores = jogadores.filter(id__in=[int(i) for i in ids.split(',') if i.strip()])
+            temporada = int(request.query_params.get('temporada', timezone.now().year))
+            janelas = request.query_params.get('janelas')
+            janelas = sorted({int(j) for j in janelas.split(',') if j.strip()}) if janelas else JANELAS_PADRAO
+        except ValueError:
+            return Response({"error": "Parâmetros inválidos"}, status=400)
+        if not clube_id and not ids:
+            return Response({"error": "Informe 'clube' ou 'ids'"}, status=400)
+        if any(j < 1 or j > 50 for j in janelas):
+            return Response({"error": "Janelas devem estar entre 1 e 50"}, status=400)
+
+        jogadores = list(jogadores.order_by('nome').values('id', 'nome', 'posicao', 'clube_id'))
+        estatisticas = estatisticas_jogadores([j['id'] for j in jogadores], temporada, janelas)
+        return Response([{**jogador, **estatisticas[jogador['id']]} for jogador in jogadores])
+
+class CompeticaoViewSet(CamposDinamicosViewSetMixin, GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Competicao.objects.all()
     serializer_class = CompeticaoSerializer
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Competicao,)
 
-class CompeticaoTimesView(APIView):
+class CompeticaoTimesView(GetCondicionalMixin, APIView):
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Competicao, Partida, Clube)
 
     def get(self, request, pk):
         try:
@@ -151,8 +272,9 @@ class CompeticaoTimesView(APIView):
         data = ClubeSerializer(clubes, many=True).data
         return Response(data)
 
-class CompeticaoClubeStatsView(APIView):
+class CompeticaoClubeStatsView(GetCondicionalMixin, APIView):
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Competicao, Clube, Partida, EstatisticaClube)
 
     def get(self, request, competicao_id, clube_id):
         try:
@@ -171,22 +293,7 @@ class CompeticaoClubeStatsView(APIView):
             Q(mandante=clube) | Q(visitante=clube)
         ).select_related('mandante', 'visitante').order_by('-data_hora')
 
-        stats = partidas_qs.aggregate(
-            total=Count('id'),
-            vitorias=Count('id', filter=Q(
-                (Q(mandante=clube) & Q(placar_mandante__gt=F('placar_visitante'))) |
-                (Q(visitante=clube) & Q(placar_visitante__gt=F('placar_mandante')))
-            )),
-            derrotas=Count('id', filter=Q(
-                (Q(mandante=clube) & Q(placar_mandante__lt=F('placar_visitante'))) |
-                (Q(visitante=clube) & Q(placar_visitante__lt=F('placar_mandante')))
-            )),
-        )
-
-        total = stats['total']
-        vitorias = stats['vitorias']
-        derrotas = stats['derrotas']
-        empates = total - (vitorias + derrotas)
+        stats = EstatisticaClube.objects.filter(competicao=competicao, clube=clube).first() or EstatisticaClube()
 
         jogos = []
         for p in partidas_qs:
@@ -213,14 +320,112 @@ class CompeticaoClubeStatsView(APIView):
                 "escudo": request.build_absolute_uri(clube.escudo.url) if clube.escudo else None,
             },
             "estatisticas": {
-                "total_jogos": total,
-                "vitorias": vitorias,
-                "derrotas": derrotas,
-                "empates": empates,
+                "total_jogos": stats.jogos,
+                "vitorias": stats.vitorias,
+                "derrotas": stats.derrotas,
+                "empates": stats.empates,
+                "gols_pro": stats.gols_pro,
+                "gols_contra": stats.gols_contra,
+                "pontos": stats.pontos,
             },
             "jogos": jogos,
         })
 
+class CompeticaoClassificacaoView(GetCondicionalMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Competicao, Partida, Clube)
+
+    def get(self, request, pk):
+        try:
+            competicao = Competicao.objects.get(pk=pk)
+        except Competicao.DoesNotExist:
+            return Response({"error": "Competição não encontrada"}, status=404)
+
+        param = request.query_params.get('criterios')
+        criterios = [c.strip() for c in param.split(',') if c.strip()] if param else list(CRITERIOS_PADRAO)
+        invalidos = [c for c in criterios if c not in CRITERIOS]
+        if invalidos:
+            return Response(
+                {"error": f"Critérios inválidos: {', '.join(invalidos)}", "disponiveis": list(CRITERIOS)},
+                status=400,
+            )
+
+        linhas = obter_classificacao(competicao.pk)
+        clubes = Clube.objects.in_bulk(list(linhas))
+        nomes = {clube_id: clube.nome for clube_id, clube in clubes.items()}
+
+        classificacao = []
+        for posicao, (clube_id, linha) in enumerate(ordenar_classificacao(linhas, nomes, criterios), start=1):
+            clube = clubes.get(clube_id)
+            classificacao.append({
+                "posicao": posicao,
+                "clube": {
+                    "id": clube_id,
+                    "nome": nomes.get(clube_id),
+                    "escudo": request.build_absolute_uri(clube.escudo.url) if clube and clube.escudo else None,
+                },
+                "pontos": linha['pontos'],
+                "jogos": linha['jogos'],
+                "vitorias": linha['vitorias'],
+                "empates": linha['empates'],
+                "derrotas": linha['derrotas'],
+                "gols_pro": linha['gols_pro'],
+                "gols_contra": linha['gols_contra'],
+                "saldo": linha['saldo'],
+                "ultimos_jogos": linha['forma'],
+            })
+
+        return Response({
+            "competicao": {"id": competicao.id, "nome": competicao.nome},
+            "criterios": criterios,
+            "classificacao": classificacao,
+        })
+
+class RankingView(GetCondicionalMixin, APIView):
+    """Artilharia, assistências e participações em gol: geral, por competição ou por clube."""
+    permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Competicao, Clube, Jogador, Gol, Partida)
+
+    def get(self, request, competicao_id=None, clube_id=None):
+        if competicao_id is not None and not Competicao.objects.filter(pk=competicao_id).exists():
+            return Response({"error": "Competição não encontrada"}, status=404)
+        if clube_id is not None and not Clube.objects.filter(pk=clube_id).exists():
+            return Response({"error": "Clube não encontrado"}, status=404)
+
+        tipo = request.query_params.get('tipo', 'gols')
+        if tipo not in TIPOS_RANKING:
+            return Response({"error": f"Tipo inválido. Use: {', '.join(TIPOS_RANKING)}"}, status=400)
+        try:
+            limite = min(max(int(request.query_params.get('limite', LIMITE_PADRAO)), 1), LIMITE_MAXIMO)
+        except ValueError:
+            return Response({"error": "Limite inválido"}, status=400)
+
+        if competicao_id is not None:
+            escopo, escopo_id = 'competicao', competicao_id
+        elif clube_id is not None:
+            escopo, escopo_id = 'clube', clube_id
+        else:
+            escopo, escopo_id = 'geral', None
+
+        ranking = []
+        for posicao, linha in enumerate(obter_ranking(tipo, escopo, escopo_id, limite), start=1):
+            jogador = linha['jogador']
+            ranking.append({
+                "posicao": posicao,
+                "jogador": {
+                    "id": jogador.id,
+                    "nome": jogador.nome,
+                    "posicao": jogador.posicao,
+                    "clube": jogador.clube.nome,
+                    "foto": request.build_absolute_uri(jogador.foto.url) if jogador.foto else None,
+                },
+                "gols": linha['gols'],
+                "assistencias": linha['assistencias'],
+                "participacoes": linha['participacoes'],
+            })
+
+        return Response({"tipo": tipo, "escopo": escopo, "escopo_id": escopo_id, "ranking": ranking})
+
 class BuscaGlobalView(APIView):
     permission_classes = [IsAuthenticated] # Aberto para o autocomplete funcionar livremente
 
@@ -230,47 +435,77 @@ class BuscaGlobalView(APIView):
         if not termo or len(termo) < 2:
             return Response([])
 
-        resultados = []
-
-        # 1. Busca Jogadores
-        jogadores = Jogador.objects.filter(nome__icontains=termo)[:3] # Pega top 3
-        s_jogadores = JogadorSerializer(jogadores, many=True).data
-        for item in s_jogadores:
-            item['tipo'] = 'JOGADOR' # Etiqueta para o Front saber a cor/ícone
-            resultados.append(item)
-
-        # 2. Busca Competições
-        competicoes = Competicao.objects.filter(nome__icontains=termo)[:3]
-        s_competicoes = CompeticaoSerializer(competicoes, many=True).data
-        for item in s_competicoes:
-            item['tipo'] = 'COMPETICAO'
-            resultados.append(item)
-
-        # 3. Busca Clubes (Adicionei esse bônus já que vi o model ali)
-        clubes = Clube.objects.filter(nome__icontains=termo)[:3]
-        s_clubes = ClubeSerializer(clubes, many=True).data
-        for item in s_clubes:
-            item['tipo'] = 'CLUBE'
-            resultados.append(item)
+        # Payload mínimo do dropdown, servido da cache em memória para prefixos quentes
+        resultados = [
+            {
+                "id": objeto_id,
+                "nome": nome,
+                "tipo": tipo, # Etiqueta para o Front saber a cor/ícone
+                "imagem": request.build_absolute_uri(default_storage.url(imagem)) if imagem else None,
+            }
+            for objeto_id, nome, tipo, imagem in autocomplete.buscar(termo, limite=3) # Top 3 por tipo
+        ]
 
         return Response(resultados)
     
 
-class PartidaViewSet(viewsets.ModelViewSet):
-    queryset = Partida.objects.all().order_by('-data_hora') 
+class PartidaViewSet(CamposDinamicosViewSetMixin, GetCondicionalMixin, viewsets.ModelViewSet):
+    queryset = Partida.objects.all().order_by('-data_hora', '-id')
     serializer_class = PartidaSerializer
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Partida, Clube, Gol, Jogador)
+    pagination_class = PartidaCursorPagination
+    # Clubes via select_related e gols (fora quando ?fields= não os pede) via prefetch saem de CamposDinamicosViewSetMixin
 
-class GolViewSet(viewsets.ModelViewSet):
+class GolViewSet(CamposDinamicosViewSetMixin, GetCondicionalMixin, viewsets.ModelViewSet):
+    # autor/assistência entram por select_related só quando os nomes estão na resposta
     queryset = Gol.objects.all()
     serializer_class = GolSerializer
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Gol, Jogador)
 
-
-class EscalacaoViewSet(viewsets.ModelViewSet):
+    # Criar e remover passam por registrar_eventos, que ajusta o placar na mesma transação
+    def _registrar(self, partida_id, evento):
+        try:
+            return registrar_eventos(partida_id, [evento])[0]
+        except EventoInvalido as e:
+            raise ValidationError({"error": "Evento inválido", "eventos": e.erros})
+
+    def perform_create(self, serializer):
+        dados = serializer.validated_data
+        criados = self._registrar(dados['partida'].pk, {
+            'tipo': 'gol',
+            'autor': dados['autor'].pk,
+            'assistencia': dados['assistencia'].pk if dados.get('assistencia') else None,
+            'minuto': dados.get('minuto'),
+            'clube': dados['clube'].pk if dados.get('clube') else None,
+        })
+        serializer.instance = criados[0]
+
+    def perform_update(self, serializer):
+        gol = serializer.instance
+        dados = serializer.validated_data
+        partida = dados.get('partida', gol.partida)
+        autor = dados.get('autor', gol.autor)
+        clube_id = dados['clube'].pk if dados.get('clube') else gol.clube_id
+        # Mesmas regras do registro: o autor joga por um dos lados e o gol vai para um deles
+        erro = erro_gol(gol.partida, autor.clube_id, clube_id)
+        if erro:
+            raise ValidationError({"error": erro})
+        lado = clube_id or autor.clube_id
+        if partida.pk != gol.partida_id or lado != (gol.clube_id or gol.autor.clube_id):
+            raise ValidationError({"error": "Para mudar a partida ou o lado do gol no placar, remova o gol e registre outro"})
+        serializer.save(clube_id=lado, contra=lado != autor.clube_id)
+
+    def perform_destroy(self, instance):
+        self._registrar(instance.partida_id, {'tipo': 'remover_gol', 'gol': instance.pk})
+
+
+class EscalacaoViewSet(CamposDinamicosViewSetMixin, GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Escalacao.objects.all()
     serializer_class = EscalacaoSerializer
     permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Escalacao,)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -278,10 +513,242 @@ class EscalacaoViewSet(viewsets.ModelViewSet):
         if partida:
             queryset = queryset.filter(partida=partida)
         return queryset
+
+    @action(detail=False, methods=['post'])
+    def resetar(self, request):
+        """Apaga em lotes as escalações de uma partida, de um clube e/ou de um intervalo de datas."""
+        serializer = ResetEscalacoesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        escopo = serializer.validated_data
+
+        user = request.user
+        if user.user_type == 'TREINADOR' and user.clube_id:
+            if escopo.get('clube', user.clube_id) != user.clube_id:
+                return Response({"error": "Treinador só pode resetar escalações do próprio clube"}, status=403)
+            escopo['clube'] = user.clube_id
+
+        queryset = escalacoes_no_escopo(
+            partida_id=escopo.get('partida'), clube_id=escopo.get('clube'),
+            inicio=escopo.get('inicio'), fim=escopo.get('fim'),
+        )
+        return Response(resetar_escalacoes(queryset))
     
-class DesempenhoViewSet(viewsets.ModelViewSet):
+class PartidaEscalacaoView(GetCondicionalMixin, APIView):
+    """Escalação completa de um clube numa partida, salva de uma vez só."""
+    permission_classes = [IsAuthenticated]
+    modelos_condicionais = (Partida, Escalacao)
+
+    def get(self, request, pk):
+        if not Partida.objects.filter(pk=pk).exists():
+            return Response({"error": "Partida não encontrada"}, status=404)
+
+        queryset = Escalacao.objects.filter(partida_id=pk).order_by('id')
+        clube_id = request.query_params.get('clube')
+        if clube_id:
+            if not clube_id.isdigit():
+                return Response({"error": "Parâmetro 'clube' inválido"}, status=400)
+            queryset = queryset.filter(clube_id=int(clube_id))
+        return Response(EscalacaoSerializer(queryset, many=True).data)
+
+    def put(self, request, pk):
+        try:
+            partida = Partida.objects.get(pk=pk)
+        except Partida.DoesNotExist:
+            return Response({"error": "Partida não encontrada"}, status=404)
+
+        serializer = EscalacaoLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        clube_id = serializer.validated_data['clube']
+        itens = {item['jogador']: item for item in serializer.validated_data['jogadores']}
+
+        if clube_id not in (partida.mandante_id, partida.visitante_id):
+            return Response({"error": "O clube não joga esta partida"}, status=400)
+
+        do_clube = set(Jogador.objects.filter(clube_id=clube_id, id__in=list(itens)).values_list('id', flat=True))
+        fora_do_clube = sorted(set(itens) - do_clube)
+        if fora_do_clube:
+            return Response({"error": "Jogadores não pertencem ao clube", "jogadores": fora_do_clube}, status=400)
+
+        with transaction.atomic():
+            # Linhas atuais do clube, mais qualquer linha desses jogadores na partida (unique_together)
+            existentes = {
+                e.jogador_id: e
+                for e in Escalacao.objects.select_for_update().filter(partida=partida).filter(
+                    Q(clube_id=clube_id) | Q(jogador_id__in=list(itens))
+                )
+            }
+
+            remover = [e.id for jogador_id, e in existentes.items() if jogador_id not in itens]
+            atualizar = []
+            criar = []
+            for jogador_id, item in itens.items():
+                campos = {'clube_id': clube_id, 'status': item['status'], 'x': item.get('x'), 'y': item.get('y')}
+                atual = existentes.get(jogador_id)
+                if atual is None:
+                    criar.append(Escalacao(partida=partida, jogador_id=jogador_id, **campos))
+                elif any(getattr(atual, campo) != valor for campo, valor in campos.items()):
+                    for campo, valor in campos.items():
+                        setattr(atual, campo, valor)
+                    atualizar.append(atual)
+
+            if remover:
+                Escalacao.objects.filter(id__in=remover).delete()
+            if atualizar:
+                Escalacao.objects.bulk_update(atualizar, ['clube', 'status', 'x', 'y'])
+            if criar:
+                Escalacao.objects.bulk_create(criar)
+            if atualizar or criar:
+                # bulk_update/bulk_create não disparam os sinais que marcam a alteração
+                marcar_alteracao(Escalacao)
+
+            escalacao = list(Escalacao.objects.filter(partida=partida, clube_id=clube_id).order_by('id'))
+            tempo_real.publicar(
+                partida.id, 'escalacao', clube=clube_id,
+                escalacao=[tempo_real.dados_escalacao(e) for e in escalacao],
+            )
+
+        return Response({
+            "criados": len(criar),
+            "atualizados": len(atualizar),
+            "removidos": len(remover),
+            "escalacao": EscalacaoSerializer(escalacao, many=True).data,
+        })
+
+class PartidaEventosView(APIView):
+    """Lote de eventos ao vivo de um operador: grava os gols e ajusta o placar na mesma transação."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        if not Partida.objects.filter(pk=pk).exists():
+            return Response({"error": "Partida não encontrada"}, status=404)
+
+        serializer = EventosPartidaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            gols, placar = registrar_eventos(pk, serializer.validated_data['eventos'])
+        except EventoInvalido as e:
+            return Response({"error": "Eventos inválidos", "eventos": e.erros}, status=400)
+
+        return Response({
+            "gols": GolSerializer(gols, many=True).data,
+            **placar,
+        }, status=201)
+
+CAMPOS_DESEMPENHO = ('nota', 'gols', 'assistencias')
+
+class PartidaDesempenhosView(APIView):
+    """Avaliação do elenco inteiro numa partida: valida linha a linha e grava tudo num único upsert."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        try:
+            partida = Partida.objects.get(pk=pk)
+        except Partida.DoesNotExist:
+            return Response({"error": "Partida não encontrada"}, status=404)
+
+        linhas = request.data.get('desempenhos') if isinstance(request.data, dict) else request.data
+        if not isinstance(linhas, list) or not linhas:
+            return Response({"error": "Envie a lista 'desempenhos' com ao menos uma linha"}, status=400)
+
+        itens = []
+        erros = [{} for _ in linhas]
+        for indice, linha in enumerate(linhas):
+            serializer = DesempenhoItemSerializer(data=linha)
+            if serializer.is_valid():
+                itens.append(serializer.validated_data)
+            else:
+                erros[indice] = serializer.errors
+                itens.append(None)
+
+        # Jogadores dos dois clubes da partida, numa query só
+        jogador_ids = {item['jogador'] for item in itens if item}
+        validos = set(Jogador.objects.filter(
+            id__in=jogador_ids, clube_id__in=(partida.mandante_id, partida.visitante_id)
+        ).values_list('id', flat=True))
+        vistos = set()
+        for indice, item in enumerate(itens):
+            if item is None:
+                continue
+            if item['jogador'] not in validos:
+                erros[indice] = {"jogador": ["Jogador não pertence a nenhum dos clubes da partida."]}
+            elif item['jogador'] in vistos:
+                erros[indice] = {"jogador": ["Jogador repetido no lote."]}
+            vistos.add(item['jogador'])
+
+        if any(erros):
+            return Response({"error": "Desempenhos inválidos", "desempenhos": erros}, status=400)
+
+        # Um upsert por combinação de campos enviados (normalmente só uma): o que não veio fica como está
+        grupos = {}
+        for item in itens:
+            grupos.setdefault(tuple(campo for campo in CAMPOS_DESEMPENHO if campo in item), []).append(item)
+
+        with transaction.atomic():
+            for campos, grupo in grupos.items():
+                linhas = [Desempenho(partida=partida, jogador_id=item['jogador'], **{c: item[c] for c in campos}) for item in grupo]
+                if campos:
+                    Desempenho.objects.bulk_create(
+                        linhas, update_conflicts=True, unique_fields=['partida', 'jogador'], update_fields=list(campos),
+                    )
+                else:
+                    Desempenho.objects.bulk_create(linhas, ignore_conflicts=True)
+            marcar_alteracao(Desempenho)
+
+        desempenhos = Desempenho.objects.filter(partida=partida, jogador_id__in=jogador_ids).select_related('jogador').order_by('id')
+        return Response(DesempenhoSerializer(desempenhos, many=True).data)
+
+class PartidaTempoRealView(View):
+    """
+    Server-Sent Events com os deltas de uma partida (gols, placar, escalação).
+
+    Cada espectador recebe o estado completo ao conectar e depois só os eventos
+    publicados pelo broker em processo. O token JWT pode vir no header
+    Authorization ou em ?token=, já que o EventSource do navegador não envia
+    headers; ele é validado sem consultar o banco.
+    """
+    intervalo_ping = 15
+
+    async def get(self, request, pk):
+        autenticacao = JWTAutenticacaoToken()
+        header = autenticacao.get_header(request)
+        bruto = autenticacao.get_raw_token(header) if header else request.GET.get('token')
+        try:
+            if not bruto:
+                raise InvalidToken()
+            # Confere também a versão do token (revogação), normalmente direto da cache
+            await sync_to_async(autenticacao.get_user)(autenticacao.get_validated_token(bruto))
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            return JsonResponse({"error": "Token inválido ou ausente"}, status=401)
+
+        if not await Partida.objects.filter(pk=pk).aexists():
+            return JsonResponse({"error": "Partida não encontrada"}, status=404)
+
+        response = StreamingHttpResponse(self.eventos(pk), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def eventos(self, pk):
+        # Assina antes de ler o estado para não perder eventos entre os dois passos
+        fila = tempo_real.broker.assinar(pk)
+        try:
+            estado = await sync_to_async(tempo_real.estado_partida)(pk)
+            yield tempo_real.formatar_sse('0', 'estado', json.dumps(estado, cls=DjangoJSONEncoder))
+            while True:
+                try:
+                    mensagem = await asyncio.wait_for(fila.get(), timeout=self.intervalo_ping)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield tempo_real.formatar_sse(*mensagem)
+        finally:
+            tempo_real.broker.cancelar(pk, fila)
+
+class DesempenhoViewSet(CamposDinamicosViewSetMixin, GetCondicionalMixin, viewsets.ModelViewSet):
     queryset = Desempenho.objects.all()
     serializer_class = DesempenhoSerializer
+    modelos_condicionais = (Desempenho, Jogador)
 
     def get_queryset(self):
         queryset = Desempenho.objects.all()
@@ -294,4 +761,107 @@ class DesempenhoViewSet(viewsets.ModelViewSet):
         if jogador_id:
             queryset = queryset.filter(jogador_id=jogador_id)
         
-        return queryset
\ No newline at end of file
+        return queryset
+
+
+# Variantes têm o hash do conteúdo no nome: nunca mudam, podem ficar em cache para sempre
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+# Uploads originais podem ser trocados: cache curto e revalidação pelo ETag
+CACHE_MIDIA = 'public, max-age=3600'
+INTERVALO_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+TAMANHO_BLOCO = 64 * 1024
+
+
+def _intervalo(cabecalho, tamanho):
+    """
+    (inicio, fim) inclusivos de um Range com um único trecho. None quando o header
+    deve ser ignorado (vários trechos ou sintaxe inválida, como bytes=3-1: vai o
+    arquivo inteiro) e ValueError quando o trecho não cabe no arquivo (416).
+    """
+    match = INTERVALO_RE.match(cabecalho.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    inicio, fim = match.groups()
+    if inicio == '':
+        # bytes=-N: os últimos N bytes
+        sufixo = int(fim)
+        if sufixo == 0 or tamanho == 0:
+            raise ValueError(cabecalho)
+        return max(tamanho - sufixo, 0), tamanho - 1
+    inicio = int(inicio)
+    if fim and int(fim) < inicio:
+        return None
+    if inicio >= tamanho:
+        raise ValueError(cabecalho)
+    return inicio, min(int(fim), tamanho - 1) if fim else tamanho - 1
+
+
+def _ler_trecho(arquivo, restante):
+    with arquivo:
+        while restante > 0:
+            bloco = arquivo.read(min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+class MidiaView(View):
+    """
+    Arquivos do MEDIA_ROOT (escudos, fotos e suas variantes) sem depender do DEBUG.
+
+    Responde 304 para If-None-Match/If-Modified-Since, aceita Range de um trecho
+    (206) e entrega o arquivo inteiro via FileResponse, que usa o sendfile do
+    servidor quando disponível.
+    """
+
+    def get(self, request, caminho):
+        try:
+            completo = safe_join(settings.MEDIA_ROOT, caminho)
+            info = os.stat(completo)
+        except (SuspiciousFileOperation, OSError):
+            raise Http404
+        if not stat.S_ISREG(info.st_mode):
+            raise Http404
+
+        etag = f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+        cabecalhos = {
+            'ETag': etag,
+            'Last-Modified': http_date(info.st_mtime),
+            'Cache-Control': CACHE_IMUTAVEL if caminho.startswith(f'{PASTA_VARIANTES}/') else CACHE_MIDIA,
+            'Accept-Ranges': 'bytes',
+        }
+
+        response = get_conditional_response(request, etag=etag, last_modified=int(info.st_mtime))
+        if response is None:
+            response = self._conteudo(request, completo, info.st_size, etag)
+        for nome, valor in cabecalhos.items():
+            response[nome] = valor
+        return response
+
+    def _conteudo(self, request, completo, tamanho, etag):
+        intervalo = None
+        cabecalho = request.headers.get('Range')
+        # If-Range com outra versão: o cliente precisa do arquivo inteiro
+        if cabecalho and request.headers.get('If-Range', etag) == etag:
+            try:
+                intervalo = _intervalo(cabecalho, tamanho)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{tamanho}'
+                return response
+
+        arquivo = open(completo, 'rb')
+        if intervalo is None:
+            return FileResponse(arquivo)
+
+        inicio, fim = intervalo
+        arquivo.seek(inicio)
+        response = StreamingHttpResponse(
+            _ler_trecho(arquivo, fim - inicio + 1),
+            status=206,
+            content_type=mimetypes.guess_type(completo)[0] or 'application/octet-stream',
+        )
+        response['Content-Length'] = fim - inicio + 1
+        response['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+        return response
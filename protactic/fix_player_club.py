@@ -6,6 +6,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'protactic.settings')
 django.setup()
 
 from backend.models import User, Jogador, Clube
+from backend.transferencias import transferir_jogadores
 
 def run():
     try:
@@ -41,13 +42,8 @@ def run():
             "Maju D", "Tomaz", "Sophia", "Breno", "Gheyson E", "Cahu"
         ]
         
-        updated_count = 0
-        for name in player_names:
-            players = Jogador.objects.filter(nome=name)
-            for p in players:
-                p.clube = target_club
-                p.save()
-                updated_count += 1
+        # Um único UPDATE, que também limpa as escalações futuras pelo clube antigo
+        updated_count = transferir_jogadores(Jogador.objects.filter(nome__in=player_names), target_club.id)['transferidos']
         
         print(f"Updated {updated_count} players to belong to {target_club.nome}")
 
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,7 +45,8 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # Usuário montado a partir das claims do token, sem query por requisição
+        "backend.autenticacao.JWTAutenticacaoToken",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -54,6 +56,7 @@ REST_FRAMEWORK = {
 AUTH_USER_MODEL = 'backend.User'
 
 MIDDLEWARE = [
+    'backend.middleware.MetricasRequisicaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,13 +90,62 @@ WSGI_APPLICATION = 'protactic.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Configurável por variáveis de ambiente. No SQLite, cada conexão nova liga WAL
+# (leitores não bloqueiam o escritor), synchronous=NORMAL, mmap e cache maiores;
+# o timeout vira busy_timeout e IMMEDIATE evita o "database is locked" ao
+# promover uma transação de leitura para escrita.
+
+def env_bool(nome, padrao=False):
+    return os.environ.get(nome, str(padrao)).lower() in ('1', 'true', 'yes', 'sim')
+
+DB_NAME = os.environ.get('DB_NAME', str(BASE_DIR / 'db.sqlite3'))
+
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('DB_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('DB_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('DB_SQLITE_CACHE_SIZE', -64000)),  # negativo = KiB
+}
+
+def sqlite_options(somente_leitura=False):
+    pragmas = dict(SQLITE_PRAGMAS)
+    if somente_leitura:
+        # O arquivo é aberto em mode=ro e não pode trocar o journal_mode
+        pragmas.pop('journal_mode')
+        pragmas['query_only'] = 'ON'
+    opcoes = {
+        'init_command': ''.join(f'PRAGMA {nome}={valor};' for nome, valor in pragmas.items()),
+        'timeout': int(os.environ.get('DB_SQLITE_BUSY_TIMEOUT', 5000)) / 1000,
+    }
+    if not somente_leitura:
+        # BEGIN IMMEDIATE pede o lock de escrita, que uma conexão mode=ro não consegue
+        opcoes['transaction_mode'] = 'IMMEDIATE'
+    return opcoes
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': DB_NAME,
+        # Conexões persistentes, verificadas antes de reaproveitar
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS'] = sqlite_options()
+
+    # Leituras analíticas longas (classificação, rankings, estatísticas do elenco)
+    # podem usar uma segunda conexão somente leitura, sem disputar com as escritas.
+    if env_bool('DB_LEITURA_SEPARADA'):
+        DATABASES['leitura'] = {
+            **DATABASES['default'],
+            'NAME': f'file:{DB_NAME}?mode=ro',
+            'OPTIONS': sqlite_options(somente_leitura=True),
+            'TEST': {'MIRROR': 'default'},
+        }
+        DATABASE_ROUTERS = ['backend.db.RoteadorLeitura']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -139,4 +191,42 @@ CORS_ALLOWED_ORIGINS = [
 
 # Media files
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+# Serve MEDIA_URL pela própria aplicação (desligue se um proxy na frente servir o MEDIA_ROOT)
+SERVIR_MIDIA = env_bool('SERVIR_MIDIA', True)
+# Busca global: cache de autocomplete em memória (por processo)
+BUSCA_CACHE_MAX_ENTRADAS = 2048
+BUSCA_CACHE_TTL = 60  # segundos
+
+# Tempo real: broker de eventos por partida (SSE em partidas/<id>/tempo-real/)
+TEMPO_REAL_BROKER = 'backend.tempo_real.BrokerMemoria'
+
+# Métricas por requisição (backend.middleware.MetricasRequisicaoMiddleware)
+METRICAS_SERVER_TIMING = True
+
+# Máximo de queries por rota (nome da URL); '*' vale para as demais. Acima disso, loga um aviso.
+ORCAMENTO_QUERIES = {
+    '*': 30,
+    'clube_dashboard': 8,
+    'competicao_times': 4,
+    'competicao_clube_stats': 6,
+    'competicao_classificacao': 4,
+    'busca_global': 6,
+    'partida-list': 4,
+    'jogador-list': 4,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'backend.metricas': {
+            'handlers': ['console'],
+            'level': os.environ.get('METRICAS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
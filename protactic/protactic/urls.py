@@ -23,7 +23,11 @@ urlpatterns = [
 ]
 
 from django.conf import settings
-from django.conf.urls.static import static
+from django.urls import re_path
+from backend.views import MidiaView
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Com DEBUG=False também: ETag/304, Range e cache imutável para as variantes (ver MidiaView)
+if settings.SERVIR_MIDIA:
+    urlpatterns += [
+        re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<caminho>.+)$', MidiaView.as_view(), name='midia'),
+    ]
@@ -4,12 +4,15 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'protactic.settings')
 django.setup()
 
-from backend.models import Escalacao
+from backend.escalacoes import escalacoes_no_escopo, resetar_escalacoes
 
 def run():
-    count = Escalacao.objects.count()
-    Escalacao.objects.all().delete()
-    print(f"Deleted {count} escalacao entries. All players are now 'Não Relacionados'.")
+    # Em lotes, para não travar o banco numa transação única (ver manage.py resetar_escalacoes)
+    resultado = resetar_escalacoes(
+        escalacoes_no_escopo(),
+        progresso=lambda removidas, total: print(f"  {removidas}/{total}"),
+    )
+    print(f"Deleted {resultado['removidas']} escalacao entries. All players are now 'Não Relacionados'.")
 
 if __name__ == '__main__':
     run()